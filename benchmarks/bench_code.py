@@ -0,0 +1,178 @@
+"""
+Highlighting throughput of `fletmint.Code`, runs headless (no Flet client).
+
+For every source and size it measures:
+- tokenize: the regex scan of every line, token cache disabled
+- build:    `Code(code=...)`, i.e. tokenization plus the control tree
+- payload:  the serialized add-commands Flet would send for that tree
+
+and reports lines per second, peak traced memory and controls created.
+
+    python benchmarks/bench_code.py
+    python benchmarks/bench_code.py --sizes 100,1000 --sources real --virtualized
+    python benchmarks/bench_code.py --json results.json  # keep for comparison
+"""
+
+import argparse
+import gc
+import inspect
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flet_core.protocol import CommandEncoder
+
+from fletmint.code import Code
+
+REAL_MODULES = ("inspect", "argparse", "typing", "dataclasses", "pathlib")
+
+
+def synthetic_source(lines, seed=0):
+    rng = random.Random(seed)
+    names = ["value", "items", "result", "config", "handler", "index", "payload"]
+    out = []
+    while len(out) < lines:
+        cls = f"Widget{len(out)}"
+        out.append(f"class {cls}(Base):")
+        out.append('    """')
+        out.append(f"    Generated {cls} used for benchmarking.")
+        out.append('    """')
+        for _ in range(rng.randint(2, 5)):
+            name = rng.choice(names)
+            out.append("")
+            out.append("    @property")
+            out.append(f"    def {name}_{len(out)}(self, {rng.choice(names)}: int = 0):")
+            out.append(f"        # compute {name}")
+            out.append(f"        data = [x * {rng.randint(0, 999)} for x in range(10)]")
+            out.append(f'        label = f"{name}: {{data!r}}" + \'{cls}\'')
+            out.append(f"        if len(data) > {rng.random():.3f} and not None:")
+            out.append(f"            raise ValueError(str({name!r}))")
+            out.append(f"        return self.{name}.get(0x{rng.randint(0, 255):02x}, label)")
+        out.append("")
+    return "\n".join(out[:lines])
+
+
+def real_source(lines):
+    chunks = [inspect.getsource(__import__(name)) for name in REAL_MODULES]
+    out = []
+    while len(out) < lines:
+        for chunk in chunks:
+            out.extend(chunk.split("\n"))
+    return "\n".join(out[:lines])
+
+
+def count_controls(control):
+    return 1 + sum(count_controls(child) for child in control._get_children())
+
+
+def measure(fn, setup=None):
+    # timed and traced separately, tracemalloc slows the timed run down a lot
+    if setup:
+        setup()
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_tokenize(text, language):
+    code = Code(code="", language=language)
+
+    def run():
+        state = None
+        for line in text.split("\n"):
+            _, state = code.scan_line(line, language, state)
+
+    return measure(run)
+
+
+def bench_build(text, language, virtualized):
+    return measure(
+        lambda: Code(code=text, language=language, virtualized=virtualized),
+        setup=Code.token_cache.clear,
+    )
+
+
+def bench_payload(code):
+    commands = code.highlighted_lines._build_add_commands()
+    return len(json.dumps(commands, cls=CommandEncoder, separators=(",", ":")))
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000,50000")
+    parser.add_argument("--sources", default="synthetic,real")
+    parser.add_argument("--language", default="python")
+    parser.add_argument("--virtualized", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    sources = {"synthetic": synthetic_source, "real": real_source}
+
+    header = (
+        f"{'source':<10} {'lines':>7} | {'tokenize l/s':>13} {'peak':>9} | "
+        f"{'build l/s':>11} {'peak':>9} {'controls':>9} | {'payload':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    results = []
+    for source in args.sources.split(","):
+        for size in sizes:
+            text = sources[source](size)
+            lines = text.count("\n") + 1
+
+            _, tokenize_time, tokenize_peak = bench_tokenize(text, args.language)
+            code, build_time, build_peak = bench_build(
+                text, args.language, args.virtualized
+            )
+            controls = count_controls(code.highlighted_lines)
+            payload = bench_payload(code)
+            results.append(
+                {
+                    "source": source,
+                    "lines": lines,
+                    "tokenize_lines_per_second": lines / tokenize_time,
+                    "tokenize_peak_bytes": tokenize_peak,
+                    "build_lines_per_second": lines / build_time,
+                    "build_peak_bytes": build_peak,
+                    "controls": controls,
+                    "payload_bytes": payload,
+                }
+            )
+
+            print(
+                f"{source:<10} {lines:>7} | "
+                f"{lines / tokenize_time:>13,.0f} {format_bytes(tokenize_peak):>9} | "
+                f"{lines / build_time:>11,.0f} {format_bytes(build_peak):>9} "
+                f"{controls:>9,} | {format_bytes(payload):>9}"
+            )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Compares the single-pass tokenizer of `fletmint.Code` with the previous
+per-rule implementation (one `re.finditer` per rule and per line, followed by
+overlap resolution in Python).
+
+    python benchmarks/bench_code_tokenizer.py [path/to/file.py] [--lines N]
+"""
+
+import argparse
+import inspect
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fletmint.code import Code
+
+
+# the python rules of the per-rule implementation, as they were before the
+# single-pass grammar, so the baseline isn't measured on the new patterns
+LEGACY_PYTHON_RULES = {
+    "keywords": (
+        r"\b(?P<KEYWORD>False|None|True|and|as|assert|async|await|break|class|continue|def|del|elif|else|except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b",
+        "keyword",
+    ),
+    "exceptions": (
+        r"([^.'\"\\#]\b|^)(?P<EXCEPTION>ArithmeticError|AssertionError|AttributeError|BaseException|BlockingIOError|BrokenPipeError|BufferError|BytesWarning|ChildProcessError|ConnectionAbortedError|ConnectionError|ConnectionRefusedError|ConnectionResetError|DeprecationWarning|EOFError|Ellipsis|EnvironmentError|Exception|FileExistsError|FileNotFoundError|FloatingPointError|FutureWarning|GeneratorExit|IOError|ImportError|ImportWarning|IndentationError|IndexError|InterruptedError|IsADirectoryError|KeyError|KeyboardInterrupt|LookupError|MemoryError|ModuleNotFoundError|NameError|NotADirectoryError|NotImplemented|NotImplementedError|OSError|OverflowError|PendingDeprecationWarning|PermissionError|ProcessLookupError|RecursionError|ReferenceError|ResourceWarning|RuntimeError|RuntimeWarning|StopAsyncIteration|StopIteration|SyntaxError|SyntaxWarning|SystemError|SystemExit|TabError|TimeoutError|TypeError|UnboundLocalError|UnicodeDecodeError|UnicodeEncodeError|UnicodeError|UnicodeTranslateError|UnicodeWarning|UserWarning|ValueError|Warning|WindowsError|ZeroDivisionError)\b",
+        "exception",
+    ),
+    "builtins": (
+        r"([^.'\"\\#]\b|^)(?P<BUILTIN>abs|all|any|ascii|bin|breakpoint|callable|chr|classmethod|compile|complex|copyright|credits|delattr|dir|divmod|enumerate|eval|exec|exit|filter|format|frozenset|getattr|globals|hasattr|hash|help|hex|id|input|isinstance|issubclass|iter|len|license|locals|map|max|memoryview|min|next|oct|open|ord|pow|print|quit|range|repr|reversed|round|set|setattr|slice|sorted|staticmethod|sum|type|vars|zip)\b",
+        "builtin",
+    ),
+    "docstrings": (
+        r"(?P<DOCSTRING>(?i:r|u|f|fr|rf|b|br|rb)?'''[^'\\]*((\\.|'(?!''))[^'\\]*)*(''')?|(?i:r|u|f|fr|rf|b|br|rb)?\"\"\"[^\"\\]*((\\.|\"(?!\"\"))[^\"\\]*)*(\"\"\")?)",
+        "docstring",
+    ),
+    "strings": (
+        r"(?P<STRING>(?i:r|u|f|fr|rf|b|br|rb)?'[^'\\\n]*(\\.[^'\\\n]*)*'?|(?i:r|u|f|fr|rf|b|br|rb)?\"[^\"\\\n]*(\\.[^\"\\\n]*)*\"?)",
+        "string",
+    ),
+    "types": (
+        r"\b(?P<TYPES>bool|bytearray|bytes|dict|float|int|list|str|tuple|object)\b",
+        "type_annotation",
+    ),
+    "numbers": (
+        r"\b(?P<NUMBER>((0x|0b|0o|#)[\da-fA-F]+)|((\d*\.)?\d+))\b",
+        "number",
+    ),
+    "function_calls": (
+        r"\b(\w+)\s*(?=\()",  # matches both standalone and dot-prefixed function calls
+        "function_call",
+    ),
+    "class_definitions": (
+        r"(?<=\bclass)[ \t]+(?P<CLASSDEF>\w+)[ \t]*[:\(]",  # recolor of DEFINITION for class definitions
+        "class_name",
+    ),
+    "decorators": (
+        r"(^[ \t]*(?P<DECORATOR>@[\w\d\.]+))",
+        "decorator",
+    ),
+    "instances": (
+        r"\b(?P<INSTANCE>super|self|cls)\b",
+        "instance",
+    ),
+    "comments": (
+        r"(?P<COMMENT>#[^\n]*)",
+        "comment",
+    ),
+}
+
+
+def legacy_tokenize_line(rules, line):
+    matches = []
+    for pattern, token in rules.values():
+        for match in re.finditer(pattern, line):
+            matches.append((match.start(), match.end(), token))
+    matches.sort(key=lambda x: (x[0], -x[1]))
+
+    tokens = []
+    last_idx = 0
+    for start, end, token in matches:
+        if start >= last_idx:
+            tokens.append((start, end, token))
+            last_idx = end
+    return tokens
+
+
+def load_source(path, min_lines):
+    if path:
+        text = Path(path).read_text(encoding="utf-8")
+    else:
+        text = inspect.getsource(inspect)
+    lines = text.split("\n")
+    while len(lines) < min_lines:
+        lines.extend(lines)
+    return lines[:min_lines]
+
+
+def timeit(fn, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?", default=None)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = load_source(args.path, args.lines)
+    code = Code(code="")
+
+    legacy = timeit(
+        lambda line: legacy_tokenize_line(LEGACY_PYTHON_RULES, line),
+        lines,
+        args.repeat,
+    )
+
+    def single_pass(tokenize):
+        def run(lines):
+            state = None
+            for line in lines:
+                _, state = tokenize(line, "python", state)
+
+        return run
+
+    single = timeit(single_pass(code.scan_line), [lines], args.repeat)
+    Code.token_cache.clear()
+    Code.token_cache.maxsize = len(lines)
+    timeit(single_pass(code.tokenize_line), [lines], 1)
+    cached = timeit(single_pass(code.tokenize_line), [lines], args.repeat)
+
+    print(f"lines:        {len(lines)}")
+    print(f"per-rule:     {legacy * 1000:8.1f} ms  ({len(lines) / legacy:,.0f} lines/s)")
+    print(f"single-pass:  {single * 1000:8.1f} ms  ({len(lines) / single:,.0f} lines/s)")
+    print(f"speedup:      {legacy / single:8.2f}x")
+    print(f"cached:       {cached * 1000:8.1f} ms  ({len(lines) / cached:,.0f} lines/s)")
+    print(f"cache:        {Code.token_cache.info()}")
+
+
+if __name__ == "__main__":
+    main()
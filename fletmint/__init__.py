@@ -6,7 +6,7 @@ from .tab_switch import TabSwitch
 from .text_input import TextInput
 from .profile import UserProfile, ProfileStatus
 from .stepper import Stepper
-from .dropdown import Dropdown
+from .dropdown import Dropdown, DropdownHoverMode
 from .tags_input import TagsInput
 from .slider import Slider
 from .toggle import Toggle
@@ -16,6 +16,6 @@ from .videoplayer import VideoPlayer
 from .badge import Badge, BadgeColors
 from .carousel import Carousel
 from .color_picker import ColorPicker
-from .toast import Toaster, Toast, ToastType, ToastPosition
+from .toast import Toaster, Toast, ToastType, ToastPosition, ToastOverflow, ToastHub, toast_hub
 
-from .code import Code, CodeTheme
+from .code import Code, CodeTheme, register_language
@@ -1,7 +1,12 @@
 import flet as ft
+import math
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
+from . import code_languages
+from .scheduler import Scheduler
 
 
 @dataclass
@@ -95,10 +100,125 @@ class CodeTheme(Enum):
     AYU_LIGHT = AyuLight()
 
 
+def compile_syntax_rules(rules):
+    # one alternation per language: every rule becomes a named group, so a
+    # single scan yields non-overlapping tokens and `lastgroup` names the rule.
+    # Consecutive rules anchored on a word boundary share a single `\b`, so
+    # positions inside words are rejected once instead of once per rule
+    alternatives = []
+    word_rules = []
+    for name, (pattern, _) in rules.items():
+        if pattern.startswith(r"\b"):
+            word_rules.append(f"(?P<{name}>{pattern[2:]})")
+            continue
+        if word_rules:
+            alternatives.append(r"\b(?:" + "|".join(word_rules) + ")")
+            word_rules = []
+        alternatives.append(f"(?P<{name}>{pattern})")
+    if word_rules:
+        alternatives.append(r"\b(?:" + "|".join(word_rules) + ")")
+    return re.compile("|".join(alternatives))
+
+
+class Grammar:
+    def __init__(self, rules, regions=None):
+        self.rules = rules
+        self.regions = regions or {}
+        self.master = compile_syntax_rules(rules)
+        # opening delimiter -> (rule, closing pattern)
+        self.closers = {
+            delimiter: (rule, re.compile(pattern))
+            for rule, delimiters in self.regions.items()
+            for delimiter, pattern in delimiters.items()
+        }
+
+
+_language_loaders = {}
+_language_aliases = {}
+_grammars = {}
+_grammars_lock = threading.Lock()
+
+
+def register_language(name, loader, aliases=()):
+    # `loader` returns (rules, regions) like the functions in `code_languages`.
+    # It is only called the first time the language is highlighted, and the
+    # compiled grammar is then shared by every Code instance
+    name = name.lower()
+    with _grammars_lock:
+        _language_loaders[name] = loader
+        _grammars.pop(name, None)
+        for alias in (name, *aliases):
+            _language_aliases[alias.lower()] = name
+    # lines tokenized with a grammar this call replaced must not be reused
+    Code.token_cache.clear()
+
+
+def get_grammar(language):
+    language = _language_aliases.get(language.lower())
+    grammar = _grammars.get(language)
+    if grammar is None and language is not None:
+        with _grammars_lock:
+            grammar = _grammars.get(language)
+            if grammar is None:
+                grammar = Grammar(*_language_loaders[language]())
+                _grammars[language] = grammar
+    return grammar
+
+
+class TokenCache:
+    # LRU of tokenized lines keyed on (language, start state, line text).
+    # Tokens hold token classes rather than colors, so entries are shared
+    # across themes and Code instances
+    def __init__(self, maxsize=20000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
 class Code(ft.UserControl):
     ttf_font_regex = re.compile(
         r"^(https?:\/\/[^\s\/$.?#].[^\s]*\.ttf$|([a-zA-Z]:\\|\/)[^\s]*\.ttf$)"
     )
+    token_cache = TokenCache()
+    # one worker thread runs the debounced highlight jobs of every Code, it
+    # is kept apart from shared_scheduler() so a long job can't stall animations
+    highlight_scheduler = Scheduler(name="fletmint-code-highlighter")
 
     def __init__(
         self,
@@ -108,6 +228,11 @@ class Code(ft.UserControl):
         theme=CodeTheme.GITHUB_DARK,
         read_only=False,
         height=600,
+        incremental=True,
+        virtualized=False,
+        line_height=20,
+        overscan=20,
+        highlight_debounce=0,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -117,58 +242,23 @@ class Code(ft.UserControl):
         self.read_only = read_only
         self.theme = theme.value if isinstance(theme, Enum) else theme
         self.height = height
-        self.syntax_rules = {
-            "python": {
-                "keywords": (
-                    r"\b(?P<KEYWORD>False|None|True|and|as|assert|async|await|break|class|continue|def|del|elif|else|except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b",
-                    self.theme.keyword,
-                ),
-                "exceptions": (
-                    r"([^.'\"\\#]\b|^)(?P<EXCEPTION>ArithmeticError|AssertionError|AttributeError|BaseException|BlockingIOError|BrokenPipeError|BufferError|BytesWarning|ChildProcessError|ConnectionAbortedError|ConnectionError|ConnectionRefusedError|ConnectionResetError|DeprecationWarning|EOFError|Ellipsis|EnvironmentError|Exception|FileExistsError|FileNotFoundError|FloatingPointError|FutureWarning|GeneratorExit|IOError|ImportError|ImportWarning|IndentationError|IndexError|InterruptedError|IsADirectoryError|KeyError|KeyboardInterrupt|LookupError|MemoryError|ModuleNotFoundError|NameError|NotADirectoryError|NotImplemented|NotImplementedError|OSError|OverflowError|PendingDeprecationWarning|PermissionError|ProcessLookupError|RecursionError|ReferenceError|ResourceWarning|RuntimeError|RuntimeWarning|StopAsyncIteration|StopIteration|SyntaxError|SyntaxWarning|SystemError|SystemExit|TabError|TimeoutError|TypeError|UnboundLocalError|UnicodeDecodeError|UnicodeEncodeError|UnicodeError|UnicodeTranslateError|UnicodeWarning|UserWarning|ValueError|Warning|WindowsError|ZeroDivisionError)\b",
-                    self.theme.exception,
-                ),
-                "builtins": (
-                    r"([^.'\"\\#]\b|^)(?P<BUILTIN>abs|all|any|ascii|bin|breakpoint|callable|chr|classmethod|compile|complex|copyright|credits|delattr|dir|divmod|enumerate|eval|exec|exit|filter|format|frozenset|getattr|globals|hasattr|hash|help|hex|id|input|isinstance|issubclass|iter|len|license|locals|map|max|memoryview|min|next|oct|open|ord|pow|print|quit|range|repr|reversed|round|set|setattr|slice|sorted|staticmethod|sum|type|vars|zip)\b",
-                    self.theme.builtin,
-                ),
-                "docstrings": (
-                    r"(?P<DOCSTRING>(?i:r|u|f|fr|rf|b|br|rb)?'''[^'\\]*((\\.|'(?!''))[^'\\]*)*(''')?|(?i:r|u|f|fr|rf|b|br|rb)?\"\"\"[^\"\\]*((\\.|\"(?!\"\"))[^\"\\]*)*(\"\"\")?)",
-                    self.theme.docstring,
-                ),
-                "strings": (
-                    r"(?P<STRING>(?i:r|u|f|fr|rf|b|br|rb)?'[^'\\\n]*(\\.[^'\\\n]*)*'?|(?i:r|u|f|fr|rf|b|br|rb)?\"[^\"\\\n]*(\\.[^\"\\\n]*)*\"?)",
-                    self.theme.string,
-                ),
-                "types": (
-                    r"\b(?P<TYPES>bool|bytearray|bytes|dict|float|int|list|str|tuple|object)\b",
-                    self.theme.type_annotation,
-                ),
-                "numbers": (
-                    r"\b(?P<NUMBER>((0x|0b|0o|#)[\da-fA-F]+)|((\d*\.)?\d+))\b",
-                    self.theme.number,
-                ),
-                "function_calls": (
-                    r"\b(\w+)\s*(?=\()",  # matches both standalone and dot-prefixed function calls
-                    self.theme.function_call,
-                ),
-                "class_definitions": (
-                    r"(?<=\bclass)[ \t]+(?P<CLASSDEF>\w+)[ \t]*[:\(]",  # recolor of DEFINITION for class definitions
-                    self.theme.class_name,
-                ),
-                "decorators": (
-                    r"(^[ \t]*(?P<DECORATOR>@[\w\d\.]+))",
-                    self.theme.decorator,
-                ),
-                "instances": (
-                    r"\b(?P<INSTANCE>super|self|cls)\b",
-                    self.theme.instance,
-                ),
-                "comments": (
-                    r"(?P<COMMENT>#[^\n]*)",
-                    self.theme.comment,
-                ),
-            },
-        }
+        self.incremental = incremental
+        self.virtualized = virtualized
+        self.line_height = line_height
+        self.overscan = overscan
+        self._lines = []
+        self._states = []
+        self._text_styles = {}
+        self.editor_container = None
+        self._viewport_height = height
+        self._first_visible = 0
+        self._window_start = 0
+        self._window_rows = []
+        self.highlight_debounce = highlight_debounce
+        self._highlight_generation = 0
+        self._pending_highlight = None
+        self._schedule_lock = threading.Lock()
+        self._highlight_lock = threading.Lock()
         self.code_textfield = ft.TextField(
             value=None if self.read_only else self.code,
             multiline=True,
@@ -195,10 +285,11 @@ class Code(ft.UserControl):
             height=self.height,
         )
 
+        self.highlighted_lines = self.apply_syntax_highlighting(
+            text=self.code, language=self.language
+        )
         self.code_highlight_container = ft.Container(
-            content=self.apply_syntax_highlighting(
-                text=self.code, language=self.language
-            ),
+            content=self.highlighted_lines,
             bgcolor=self.theme.editor_bg,
             border_radius=8,
             width=800,
@@ -226,80 +317,344 @@ class Code(ft.UserControl):
                         print("Max retries reached. Operation failed.")
 
     def apply_syntax_highlighting(self, text, language):
-        rules = self.syntax_rules.get(language, {})
-        formatted_lines = []
+        self._lines = text.split("\n")
+        self._states = []
+        if self.virtualized:
+            return self.build_viewport()
+
         full_lines = ft.ListView(spacing=1)
+        state = None
+        for idx, line in enumerate(self._lines):
+            tokens, state = self.tokenize_line(line, language, state)
+            full_lines.controls.append(self.build_line(idx, line, tokens))
+            self._states.append(state)
+        return full_lines
+
+    def build_viewport(self):
+        # only the visible window (plus overscan) is made of real rows, the
+        # lines above and below it are stood in for by two fixed-height spacers
+        self._top_spacer = ft.Container(height=0)
+        self._bottom_spacer = ft.Container(height=0)
+        self._first_visible = 0
+        self._window_start = 0
+        self._window_rows = []
+        viewport = ft.ListView(spacing=0, on_scroll=self.on_viewport_scroll)
+        self.fill_viewport(viewport, 0)
+        return viewport
+
+    def fill_viewport(self, viewport, first_visible):
+        total = len(self._lines)
+        visible = math.ceil(self._viewport_height / self.line_height)
+        end = min(total, first_visible + visible + self.overscan)
+        start = min(max(0, first_visible - self.overscan), end)
+
+        rows = []
+        for idx in range(start, end):
+            cached = idx - self._window_start
+            if 0 <= cached < len(self._window_rows):
+                rows.append(self._window_rows[cached])
+                continue
+            tokens, _ = self.tokenize_line(
+                self._lines[idx], self.language, self.state_before(idx)
+            )
+            rows.append(self.build_line(idx, self._lines[idx], tokens))
+
+        self._first_visible = first_visible
+        self._window_start, self._window_rows = start, rows
+        self._top_spacer.height = start * self.line_height
+        self._bottom_spacer.height = (total - end) * self.line_height
+        viewport.controls = [self._top_spacer, *rows, self._bottom_spacer]
+
+    def state_before(self, idx):
+        # in virtualized mode end states are only computed up to the lines
+        # that have been rendered so far
+        while len(self._states) < idx:
+            line_idx = len(self._states)
+            _, state = self.tokenize_line(
+                self._lines[line_idx],
+                self.language,
+                self._states[-1] if line_idx else None,
+            )
+            self._states.append(state)
+        return self._states[idx - 1] if idx else None
+
+    def on_viewport_scroll(self, e):
+        # a debounced highlight job may be swapping `_lines` meanwhile
+        with self._highlight_lock:
+            if e.viewport_dimension:
+                self._viewport_height = e.viewport_dimension
+            first_visible = int(e.pixels // self.line_height)
+            last_visible = first_visible + math.ceil(
+                self._viewport_height / self.line_height
+            )
+            window_end = self._window_start + len(self._window_rows)
+            if (first_visible >= self._window_start or self._window_start == 0) and (
+                last_visible <= window_end or window_end == len(self._lines)
+            ):
+                return
+            self.fill_viewport(self.highlighted_lines, first_visible)
+            self.highlighted_lines.update()
+
+    def tokenize_line(self, line, language, state=None):
+        # `state` is the region left open by the previous line (e.g. "'''" inside
+        # a triple-quoted string); returns the tokens and this line's end state
+        key = (language, state, line)
+        entry = self.token_cache.get(key)
+        if entry is None:
+            entry = self.scan_line(line, language, state)
+            self.token_cache.put(key, entry)
+        return entry
+
+    def scan_line(self, line, language, state=None):
+        grammar = get_grammar(language)
+        if grammar is None:
+            return (), None
+        master = grammar.master
+        rules = grammar.rules
+        regions = grammar.closers
+        region_rules = grammar.regions
+        tokens = []
+        pos = 0
 
-        lines = text.split("\n")
-        for idx, line in enumerate(lines):
-            parts = []
-            last_idx = 0
-            matches = []
-
-            for element, (pattern, color) in rules.items():
-                for match in re.finditer(pattern, line):
-                    matches.append((match.start(), match.end(), match.group(0), color))
-
-            matches.sort(key=lambda x: (x[0], -x[1]))
-
-            # Improved overlap handling
-            for start, end, matched_text, color in matches:
-                if start >= last_idx:
-                    if start > last_idx:
-                        parts.append(
-                            ft.Text(
-                                value=line[last_idx:start],
-                                style=ft.TextStyle(size=14),
-                                font_family=self.font,
-                            )
-                        )
-                    parts.append(
-                        ft.Text(
-                            value=matched_text,
-                            style=ft.TextStyle(color=color, size=14),
-                            font_family=self.font,
-                        )
-                    )
-                    last_idx = end
-
-            # Handle remaining text after last match
-            if last_idx < len(line):
-                parts.append(
-                    ft.Text(
-                        value=line[last_idx:],
-                        style=ft.TextStyle(size=14),
-                        font_family=self.font,
-                    )
+        if state is not None:
+            rule, closer = regions[state]
+            match = closer.match(line)
+            if match is None:
+                return ((0, len(line), rules[rule][1]),) if line else (), state
+            tokens.append((0, match.end(), rules[rule][1]))
+            pos = match.end()
+
+        while True:
+            match = master.search(line, pos)
+            if match is None:
+                return tuple(tokens), None
+            start, end, rule = match.start(), match.end(), match.lastgroup
+            if end == start:
+                pos = end + 1
+                continue
+
+            if rule in region_rules:
+                delimiter = next(
+                    d for d in region_rules[rule] if match.group(rule).endswith(d)
                 )
+                closing = regions[delimiter][1].match(line, end)
+                if closing is None:
+                    tokens.append((start, len(line), rules[rule][1]))
+                    return tuple(tokens), delimiter
+                end = closing.end()
 
-            # Create a Row and add all parts to it without introducing new spaces
-            line_number = ft.Container(ft.Text(f"{idx + 1}", color="#60676f"), width=40)
-            line_widgets = ft.Row(controls=[line_number] + parts, wrap=None, spacing=0)
-            formatted_lines.append(line_widgets)
+            tokens.append((start, end, rules[rule][1]))
+            pos = end
 
-        full_lines.controls.extend(formatted_lines)
-        return full_lines
+    def text_style(self, token):
+        # one shared style per token class instead of one per span
+        style = self._text_styles.get(token)
+        if style is None:
+            style = ft.TextStyle(color=getattr(self.theme, token))
+            self._text_styles[token] = style
+        return style
+
+    def build_spans(self, line, tokens):
+        # coalesce the token stream into runs: adjacent pieces of the same token
+        # class are merged, and whitespace between tokens joins a neighbouring
+        # run since its color is invisible anyway
+        runs = []
+        pending = ""
+        last_idx = 0
+        for start, end, token in tokens:
+            if start > last_idx:
+                gap = line[last_idx:start]
+                if not gap.isspace():
+                    runs.append([gap, None])
+                elif runs:
+                    runs[-1][0] += gap
+                else:
+                    pending = gap
+            if runs and runs[-1][1] == token:
+                runs[-1][0] += line[start:end]
+            else:
+                runs.append([pending + line[start:end], token])
+                pending = ""
+            last_idx = end
+
+        # Handle remaining text after last match
+        if last_idx < len(line):
+            runs.append([line[last_idx:], None])
+        return runs
+
+    def build_line(self, idx, line, tokens):
+        runs = self.build_spans(line, tokens)
+        # a leading plain run becomes the Text value, the rest are styled spans
+        value = runs.pop(0)[0] if runs and runs[0][1] is None else None
+        return ft.Row(
+            controls=[
+                ft.Text(f"{idx + 1}", color="#60676f", width=40),
+                ft.Text(
+                    value=value,
+                    spans=[
+                        ft.TextSpan(text, self.text_style(token) if token else None)
+                        for text, token in runs
+                    ],
+                    size=14,
+                    font_family=self.font,
+                    no_wrap=True,
+                ),
+            ],
+            wrap=None,
+            spacing=0,
+            height=self.line_height if self.virtualized else None,
+        )
+
+    @staticmethod
+    def diff_lines(old_lines, new_lines):
+        # returns the changed window as (start, old_end, new_end): lines before
+        # `start` and after the `*_end` indexes are identical in both buffers
+        start = 0
+        limit = min(len(old_lines), len(new_lines))
+        while start < limit and old_lines[start] == new_lines[start]:
+            start += 1
+
+        old_end, new_end = len(old_lines), len(new_lines)
+        while (
+            old_end > start
+            and new_end > start
+            and old_lines[old_end - 1] == new_lines[new_end - 1]
+        ):
+            old_end -= 1
+            new_end -= 1
+        return start, old_end, new_end
+
+    def patch_highlighting(self, text):
+        new_lines = text.split("\n")
+        start, old_end, new_end = self.diff_lines(self._lines, new_lines)
+        if start == old_end == new_end:
+            return False
+
+        if self.virtualized:
+            # rendered rows from the edit down are stale, states are recomputed
+            # lazily the next time the window is filled
+            self._lines = new_lines
+            del self._states[start:]
+            del self._window_rows[max(0, start - self._window_start) :]
+            self.fill_viewport(self.highlighted_lines, self._first_visible)
+            return True
+
+        # re-tokenize the edited lines, then keep going only while a line's
+        # start state differs from the cached one (e.g. an opened docstring)
+        shift = old_end - new_end
+        state = self._states[start - 1] if start else None
+        rows, states = [], []
+        idx = start
+        while idx < len(new_lines):
+            if idx >= new_end:
+                old_idx = idx + shift
+                if state == (self._states[old_idx - 1] if old_idx else None):
+                    break
+            tokens, state = self.tokenize_line(new_lines[idx], self.language, state)
+            rows.append(self.build_line(idx, new_lines[idx], tokens))
+            states.append(state)
+            idx += 1
+
+        lines = self.highlighted_lines.controls
+        lines[start : idx + shift] = rows
+        self._states[start : idx + shift] = states
+        # lines below the edit only need renumbering when lines were added/removed
+        if shift:
+            for line_idx in range(idx, len(lines)):
+                lines[line_idx].controls[0].value = f"{line_idx + 1}"
+
+        self._lines = new_lines
+        return True
 
     def update_highlight(self, e=None):
-        highlighted_code = self.apply_syntax_highlighting(
-            text=self.code_textfield_container.content.value, language=self.language
+        if self.highlight_debounce:
+            self.schedule_highlight()
+        else:
+            self.refresh_highlight()
+
+    def schedule_highlight(self):
+        # every edit supersedes the pending job: highlighting runs off the event
+        # handler once typing pauses for `highlight_debounce` seconds
+        with self._schedule_lock:
+            self._highlight_generation += 1
+            if self._pending_highlight is not None:
+                self._pending_highlight.cancel()
+            self._pending_highlight = self.highlight_scheduler.call_later(
+                self.highlight_debounce,
+                self.run_highlight_job,
+                self._highlight_generation,
+            )
+
+    def run_highlight_job(self, generation):
+        with self._highlight_lock:
+            if generation != self._highlight_generation:
+                return
+            self.refresh_highlight(generation)
+
+    def refresh_highlight(self, generation=None):
+        # jobs always read the current buffer, so whichever job runs last
+        # applies the latest text
+        text = self.code_textfield.value or ""
+        if self.incremental:
+            if self.patch_highlighting(text):
+                self.highlighted_lines.update()
+            return
+
+        highlighted_lines = self.apply_syntax_highlighting(
+            text=text, language=self.language
         )
-        self.code_highlight_container.content = highlighted_code
+        if generation is not None and generation != self._highlight_generation:
+            return
+        self.highlighted_lines = highlighted_lines
+        self.code_highlight_container.content = self.highlighted_lines
         self.code_highlight_container.update()
 
+    def will_unmount(self):
+        with self._schedule_lock:
+            if self._pending_highlight is not None:
+                self._pending_highlight.cancel()
+                self._pending_highlight = None
+
+    def set_theme(self, theme):
+        # lines keep only token classes and all spans of a class share one
+        # style, so restyling rewrites a color per class and never tokenizes
+        self.theme = theme.value if isinstance(theme, Enum) else theme
+        for token, style in self._text_styles.items():
+            style.color = getattr(self.theme, token)
+        self.code_highlight_container.bgcolor = self.theme.editor_bg
+        if self.editor_container is not None:
+            self.editor_container.bgcolor = self.theme.editor_bg
+        if self.page:
+            self.update()
+
     def build(self):
         if self.read_only:
-            return ft.Container(
+            self.editor_container = ft.Container(
                 ft.Stack(controls=[self.code_highlight_container]),
                 padding=10,
                 bgcolor=self.theme.editor_bg,
                 border_radius=8,
             )
-        return ft.Container(
-            ft.Stack(
-                controls=[self.code_highlight_container, self.code_textfield_container]
-            ),
-            padding=10,
-            bgcolor=self.theme.editor_bg,
-            border_radius=8,
-        )
+        else:
+            self.editor_container = ft.Container(
+                ft.Stack(
+                    controls=[
+                        self.code_highlight_container,
+                        self.code_textfield_container,
+                    ]
+                ),
+                padding=10,
+                bgcolor=self.theme.editor_bg,
+                border_radius=8,
+            )
+        return self.editor_container
+
+
+register_language("python", code_languages.python_grammar, aliases=("py",))
+register_language("json", code_languages.json_grammar)
+register_language("yaml", code_languages.yaml_grammar, aliases=("yml",))
+register_language("sql", code_languages.sql_grammar)
+register_language(
+    "javascript", code_languages.javascript_grammar, aliases=("js", "jsx", "mjs")
+)
+register_language("bash", code_languages.bash_grammar, aliases=("sh", "shell", "zsh"))
@@ -0,0 +1,277 @@
+# Grammars for `fletmint.Code`. Every function returns `(rules, regions)`:
+# - rules: {name: (pattern, theme attribute)} in priority order, when two rules
+#   match at the same position the one listed first wins
+# - regions: multi-line constructs opened by a rule, {rule: {opening delimiter:
+#   closing pattern}}. A line that leaves one open ends in the state of its
+#   delimiter
+# Patterns are only built when a language is first highlighted, see
+# `fletmint.code.register_language`.
+
+
+def python_grammar():
+    rules = {
+        "comments": (
+            r"(?P<COMMENT>#[^\n]*)",
+            "comment",
+        ),
+        "docstrings": (
+            r"(?P<DOCSTRING>(?:[rR][bBfF]?|[bBfF][rR]?|[uU])?(?:'''|\"\"\"))",  # opening quotes only, see regions
+            "docstring",
+        ),
+        "strings": (
+            r"(?P<STRING>(?:[rR][bBfF]?|[bBfF][rR]?|[uU])?'[^'\\\n]*(\\.[^'\\\n]*)*'?|(?:[rR][bBfF]?|[bBfF][rR]?|[uU])?\"[^\"\\\n]*(\\.[^\"\\\n]*)*\"?)",
+            "string",
+        ),
+        "decorators": (
+            r"(^[ \t]*(?P<DECORATOR>@[\w\d\.]+))",
+            "decorator",
+        ),
+        "class_definitions": (
+            r"(?<=\bclass)[ \t]+(?P<CLASSDEF>\w+)[ \t]*[:\(]",  # recolor of DEFINITION for class definitions
+            "class_name",
+        ),
+        "keywords": (
+            r"\b(?P<KEYWORD>False|None|True|and|as|assert|async|await|break|class|continue|def|del|elif|else|except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b",
+            "keyword",
+        ),
+        "exceptions": (
+            r"\b(?<![.'\"\\#])(?P<EXCEPTION>ArithmeticError|AssertionError|AttributeError|BaseException|BlockingIOError|BrokenPipeError|BufferError|BytesWarning|ChildProcessError|ConnectionAbortedError|ConnectionError|ConnectionRefusedError|ConnectionResetError|DeprecationWarning|EOFError|Ellipsis|EnvironmentError|Exception|FileExistsError|FileNotFoundError|FloatingPointError|FutureWarning|GeneratorExit|IOError|ImportError|ImportWarning|IndentationError|IndexError|InterruptedError|IsADirectoryError|KeyError|KeyboardInterrupt|LookupError|MemoryError|ModuleNotFoundError|NameError|NotADirectoryError|NotImplemented|NotImplementedError|OSError|OverflowError|PendingDeprecationWarning|PermissionError|ProcessLookupError|RecursionError|ReferenceError|ResourceWarning|RuntimeError|RuntimeWarning|StopAsyncIteration|StopIteration|SyntaxError|SyntaxWarning|SystemError|SystemExit|TabError|TimeoutError|TypeError|UnboundLocalError|UnicodeDecodeError|UnicodeEncodeError|UnicodeError|UnicodeTranslateError|UnicodeWarning|UserWarning|ValueError|Warning|WindowsError|ZeroDivisionError)\b",
+            "exception",
+        ),
+        "builtins": (
+            r"\b(?<![.'\"\\#])(?P<BUILTIN>abs|all|any|ascii|bin|breakpoint|callable|chr|classmethod|compile|complex|copyright|credits|delattr|dir|divmod|enumerate|eval|exec|exit|filter|format|frozenset|getattr|globals|hasattr|hash|help|hex|id|input|isinstance|issubclass|iter|len|license|locals|map|max|memoryview|min|next|oct|open|ord|pow|print|quit|range|repr|reversed|round|set|setattr|slice|sorted|staticmethod|sum|type|vars|zip)\b",
+            "builtin",
+        ),
+        "types": (
+            r"\b(?P<TYPES>bool|bytearray|bytes|dict|float|int|list|str|tuple|object)\b",
+            "type_annotation",
+        ),
+        "instances": (
+            r"\b(?P<INSTANCE>super|self|cls)\b",
+            "instance",
+        ),
+        "function_calls": (
+            r"\b(\w+)\s*(?=\()",  # matches both standalone and dot-prefixed function calls
+            "function_call",
+        ),
+        "numbers": (
+            r"\b(?P<NUMBER>((0x|0b|0o|#)[\da-fA-F]+)|((\d*\.)?\d+))\b",
+            "number",
+        ),
+    }
+    regions = {
+        "docstrings": {
+            "'''": r"(?:\\.|[^\\])*?'''",
+            '"""': r'(?:\\.|[^\\])*?"""',
+        },
+    }
+    return rules, regions
+
+
+def json_grammar():
+    rules = {
+        "keys": (
+            r"(?P<KEY>\"[^\"\\\n]*(\\.[^\"\\\n]*)*\")(?=\s*:)",
+            "parameter",
+        ),
+        "strings": (
+            r"(?P<STRING>\"[^\"\\\n]*(\\.[^\"\\\n]*)*\"?)",
+            "string",
+        ),
+        "constants": (
+            r"\b(?P<CONSTANT>true|false|null)\b",
+            "builtin",
+        ),
+        "numbers": (
+            r"(?P<NUMBER>-?\b\d+(\.\d+)?([eE][+-]?\d+)?)\b",
+            "number",
+        ),
+    }
+    return rules, {}
+
+
+def yaml_grammar():
+    rules = {
+        "comments": (
+            r"(?P<COMMENT>(^|(?<=\s))#[^\n]*)",
+            "comment",
+        ),
+        "documents": (
+            r"(?P<DOCUMENT>^(---|\.\.\.)(?=\s|$))",
+            "keyword",
+        ),
+        "keys": (
+            r"(?P<KEY>^[ \t]*(- )?[\w\-. /]+?|\"[^\"\n]*\"|'[^'\n]*')(?=[ \t]*:(\s|$))",
+            "parameter",
+        ),
+        "strings": (
+            r"(?P<STRING>\"[^\"\\\n]*(\\.[^\"\\\n]*)*\"?|'[^'\n]*'?)",
+            "string",
+        ),
+        "anchors": (
+            r"(?P<ANCHOR>[&*][\w\-]+)",
+            "decorator",
+        ),
+        "tags": (
+            r"(?P<TAG>!![\w\-]+|![\w\-]*)",
+            "type_annotation",
+        ),
+        "constants": (
+            r"\b(?P<CONSTANT>true|false|True|False|TRUE|FALSE|yes|no|on|off|null|Null|NULL)\b",
+            "builtin",
+        ),
+        "numbers": (
+            r"\b(?P<NUMBER>0x[\da-fA-F]+|0o[0-7]+|\d+(\.\d+)?([eE][+-]?\d+)?)\b",
+            "number",
+        ),
+    }
+    return rules, {}
+
+
+def sql_grammar():
+    rules = {
+        "comments": (
+            r"(?P<COMMENT>--[^\n]*)",
+            "comment",
+        ),
+        "block_comments": (
+            r"(?P<BLOCKCOMMENT>/\*)",  # opening only, see regions
+            "comment",
+        ),
+        "strings": (
+            r"(?P<STRING>'([^'\n]|'')*'?)",
+            "string",
+        ),
+        "identifiers": (
+            r"(?P<IDENTIFIER>\"[^\"\n]*\"?|`[^`\n]*`?|\[[^\]\n]*\]?)",
+            "instance",
+        ),
+        "keywords": (
+            r"\b(?i:(?P<KEYWORD>add|all|alter|and|any|as|asc|begin|between|by|case|check|column|commit|constraint|create|cross|database|default|delete|desc|distinct|drop|else|end|exists|foreign|from|full|group|having|if|in|index|inner|insert|into|is|join|key|left|like|limit|not|null|offset|on|or|order|outer|primary|references|returning|right|rollback|select|set|table|then|top|transaction|truncate|union|unique|update|using|values|view|when|where|with))\b",
+            "keyword",
+        ),
+        "types": (
+            r"\b(?i:(?P<TYPES>bigint|binary|bit|blob|boolean|char|date|datetime|decimal|double|float|int|integer|interval|json|numeric|real|serial|smallint|text|time|timestamp|uuid|varchar))\b",
+            "type_annotation",
+        ),
+        "constants": (
+            r"\b(?i:(?P<CONSTANT>true|false))\b",
+            "builtin",
+        ),
+        "function_calls": (
+            r"\b(\w+)\s*(?=\()",
+            "function_call",
+        ),
+        "numbers": (
+            r"\b(?P<NUMBER>\d+(\.\d+)?)\b",
+            "number",
+        ),
+        "parameters": (
+            r"(?P<PARAMETER>[:@$]\w+|\?)",
+            "parameter",
+        ),
+    }
+    regions = {
+        "block_comments": {"/*": r".*?\*/"},
+    }
+    return rules, regions
+
+
+def javascript_grammar():
+    rules = {
+        "comments": (
+            r"(?P<COMMENT>//[^\n]*)",
+            "comment",
+        ),
+        "block_comments": (
+            r"(?P<BLOCKCOMMENT>/\*)",  # opening only, see regions
+            "comment",
+        ),
+        "template_strings": (
+            r"(?P<TEMPLATE>`)",  # opening only, see regions
+            "string",
+        ),
+        "strings": (
+            r"(?P<STRING>'[^'\\\n]*(\\.[^'\\\n]*)*'?|\"[^\"\\\n]*(\\.[^\"\\\n]*)*\"?)",
+            "string",
+        ),
+        "decorators": (
+            r"(?P<DECORATOR>@[\w.]+)",
+            "decorator",
+        ),
+        "class_definitions": (
+            r"(?<=\bclass)[ \t]+(?P<CLASSDEF>[\w$]+)",
+            "class_name",
+        ),
+        "function_definitions": (
+            r"(?<=\bfunction)[ \t]*\*?[ \t]*(?P<FUNCDEF>[\w$]+)",
+            "function",
+        ),
+        "keywords": (
+            r"\b(?P<KEYWORD>async|await|break|case|catch|class|const|continue|debugger|default|delete|do|else|export|extends|false|finally|for|from|function|get|if|import|in|instanceof|let|new|null|of|return|set|static|super|switch|throw|true|try|typeof|undefined|var|void|while|with|yield)\b",
+            "keyword",
+        ),
+        "exceptions": (
+            r"\b(?P<EXCEPTION>AggregateError|Error|EvalError|RangeError|ReferenceError|SyntaxError|TypeError|URIError)\b",
+            "exception",
+        ),
+        "builtins": (
+            r"\b(?<![.])(?P<BUILTIN>Array|BigInt|Boolean|Date|Infinity|Intl|JSON|Map|Math|NaN|Number|Object|Promise|Proxy|Reflect|RegExp|Set|String|Symbol|WeakMap|WeakSet|console|document|globalThis|window)\b",
+            "builtin",
+        ),
+        "instances": (
+            r"\b(?P<INSTANCE>this)\b",
+            "instance",
+        ),
+        "function_calls": (
+            r"\b([\w$]+)\s*(?=\()",
+            "function_call",
+        ),
+        "numbers": (
+            r"\b(?P<NUMBER>0[xX][\da-fA-F_]+n?|0[bB][01_]+n?|0[oO][0-7_]+n?|(\d[\d_]*\.?[\d_]*|\.\d[\d_]*)([eE][+-]?\d+)?n?)",
+            "number",
+        ),
+    }
+    regions = {
+        "block_comments": {"/*": r".*?\*/"},
+        "template_strings": {"`": r"(?:\\.|[^\\])*?`"},
+    }
+    return rules, regions
+
+
+def bash_grammar():
+    rules = {
+        "comments": (
+            r"(?P<COMMENT>(^|(?<=[\s;]))#[^\n]*)",
+            "comment",
+        ),
+        "strings": (
+            r"(?P<STRING>'[^'\n]*'?|\"[^\"\\\n]*(\\.[^\"\\\n]*)*\"?)",
+            "string",
+        ),
+        "variables": (
+            r"(?P<VARIABLE>\$(\{[^}\n]*\}?|\w+|[@*#?$!\-0-9]))",
+            "parameter",
+        ),
+        "function_definitions": (
+            r"(?P<FUNCDEF>^[ \t]*(function[ \t]+)?[\w\-]+)(?=[ \t]*\(\))",
+            "function",
+        ),
+        "keywords": (
+            r"\b(?P<KEYWORD>case|do|done|elif|else|esac|fi|for|function|if|in|select|then|time|until|while)\b",
+            "keyword",
+        ),
+        "builtins": (
+            r"\b(?<![-.])(?P<BUILTIN>alias|bg|bind|break|builtin|cd|command|continue|declare|echo|eval|exec|exit|export|false|fg|getopts|hash|jobs|kill|let|local|printf|pwd|read|readonly|return|set|shift|source|test|trap|true|type|ulimit|umask|unalias|unset|wait)\b(?![-.])",
+            "builtin",
+        ),
+        "options": (
+            r"(?<=\s)(?P<OPTION>--?[\w\-]+)",
+            "decorator",
+        ),
+        "numbers": (
+            r"\b(?P<NUMBER>\d+)\b",
+            "number",
+        ),
+    }
+    return rules, {}
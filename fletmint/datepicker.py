@@ -1,9 +1,13 @@
 import flet as ft
 from .text_input import TextInput
 from .button import Button, SecondaryButton
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from dataclasses import dataclass
-import locale, time
+from functools import lru_cache
+import calendar
+import locale
+from .page_scroll import PageScrollDispatcher
+from .scheduler import shared_scheduler
 
 
 @dataclass
@@ -53,6 +57,23 @@ class DatePickerColors:
         )
 
 
+WEEKDAYS = ("Mo", "Tu", "We", "Th", "Fr", "Sa", "Su")
+
+
+@lru_cache(maxsize=256)
+def month_layout(year, month, first_weekday=0):
+    # the cells of a month page, whole weeks: (label, date) with date None for
+    # the days of the previous and next month
+    return tuple(
+        (
+            str(day.day),
+            datetime(day.year, day.month, day.day) if day.month == month else None,
+        )
+        for week in calendar.Calendar(first_weekday).monthdatescalendar(year, month)
+        for day in week
+    )
+
+
 class DatePicker(ft.UserControl):
     def __init__(
         self,
@@ -62,6 +83,7 @@ class DatePicker(ft.UserControl):
         is_dropdown=True,
         multi_select_mode=True,
         show_today=True,
+        first_weekday=0,
         animated=False,
         on_date_choosen=None,
         on_cancel=None,
@@ -78,6 +100,7 @@ class DatePicker(ft.UserControl):
         self.max_width = max_width
         self.is_dropdown = is_dropdown
         self.show_today = show_today
+        self.first_weekday = first_weekday
         self.on_date_choosen = on_date_choosen
         self.on_cancel = on_cancel
         self.multi_select_mode = multi_select_mode
@@ -94,31 +117,31 @@ class DatePicker(ft.UserControl):
         self.show_splash = False
         self._dropdown_starter_bounds = None
         self.previous_selected_button = None
+        self.pending_animation = None
 
     def did_mount(self):
-        self.page.on_scroll = self.on_page_scroll
+        self.scroll_dispatcher = PageScrollDispatcher.for_page(self.page)
         self.page.update()
 
-    def on_page_scroll(self, e):
-        if self.show_splash:
-            if e.event_type == "update":
-                new_position_y = (
-                    self._dropdown_starter_bounds["bottom_left"][1] - e.pixels
-                )
+    def will_unmount(self):
+        self.cancel_animation()
+        self.scroll_dispatcher.closed(self)
 
-                # Check if the new position is within the viewport
-                if self.is_within_viewport(new_position_y):
-                    self.page.splash = self.update_dropdown_position(
-                        (
-                            self._dropdown_starter_bounds["bottom_left"][0],
-                            new_position_y,
-                        )
-                    )
-                else:
-                    # hide the splash if it is out of viewport
-                    self.page.splash = None
+    def reposition_splash(self, pixels):
+        # called by the page's scroll dispatcher while the calendar is open
+        new_position_y = self._dropdown_starter_bounds["bottom_left"][1] - pixels
 
-                self.page.update()
+        # Check if the new position is within the viewport
+        if self.is_within_viewport(new_position_y):
+            self.page.splash = self.update_dropdown_position(
+                (
+                    self._dropdown_starter_bounds["bottom_left"][0],
+                    new_position_y,
+                )
+            )
+        elif self.page.splash is self.calendar_dropdown:
+            # hide the splash if it is out of viewport
+            self.page.splash = None
 
     def is_within_viewport(self, y_position):
         viewport_height = self.page.height
@@ -131,16 +154,14 @@ class DatePicker(ft.UserControl):
                 0
             ].value = ", ".join(dates)
             self.unfocus_dropdown()
-            if self.animated:
-                self.animate_dropdown(toggle=False)
-            self.close_calendar_dropdown()
+            self.hide_calendar_dropdown()
         if self.on_date_choosen:
             self.on_date_choosen(self.selected_dates)
 
     def __on_cancel(self, e):
         if self.is_dropdown:
             self.unfocus_dropdown()
-            self.close_calendar_dropdown()
+            self.hide_calendar_dropdown()
         if self.on_cancel:
             self.on_cancel()
 
@@ -153,11 +174,34 @@ class DatePicker(ft.UserControl):
         )
         self.dropdown_starter.update()
 
+    def hide_calendar_dropdown(self):
+        if self.animated:
+            self.show_splash = False
+            self.animate_dropdown(toggle=False)
+            # the splash goes away once the closing animation is over
+            self.schedule_animation(0.4, self.close_calendar_dropdown)
+        else:
+            self.close_calendar_dropdown()
+
     def close_calendar_dropdown(self):
-        self.page.splash = None
+        self.pending_animation = None
+        self.scroll_dispatcher.closed(self)
+        if self.page.splash is self.calendar_dropdown:
+            self.page.splash = None
         self.show_splash = False
         self.page.update()
 
+    def schedule_animation(self, delay, callback, *args):
+        # animation steps are timed on the shared scheduler thread, event
+        # handlers return right away instead of sleeping through them
+        self.cancel_animation()
+        self.pending_animation = shared_scheduler().call_later(delay, callback, *args)
+
+    def cancel_animation(self):
+        if self.pending_animation is not None:
+            self.pending_animation.cancel()
+            self.pending_animation = None
+
     def adjust_month(self, change):
         new_month = self.current_month + change
         if new_month > 12:
@@ -171,60 +215,67 @@ class DatePicker(ft.UserControl):
         self.update_calendar()
 
     def update_calendar(self):
-        self.calendarpicker.content.controls[1] = self.build_calendar()
+        self.fill_calendar()
         self.calendarpicker.content.controls[0].controls[1].value = datetime(
             self.current_year, self.current_month, 1
         ).strftime("%B %Y")
         self.calendarpicker.update()
 
     def build_calendar(self):
+        # built once with the 42 day buttons a month can need, changing month
+        # only refills their text, data and style (see fill_calendar)
+        self.day_buttons = [
+            self.create_day_button("", is_filler=True) for _ in range(42)
+        ]
         grid = ft.GridView(
             controls=[
                 ft.Container(
-                    ft.Text(day, color=self.colors.weekday_color),
+                    ft.Text(
+                        WEEKDAYS[(self.first_weekday + i) % 7],
+                        color=self.colors.weekday_color,
+                    ),
                     alignment=ft.alignment.center,
                 )
-                for day in ("Mo", "Tu", "We", "Th", "Fr", "Sa", "Su")
-            ],
+                for i in range(7)
+            ]
+            + self.day_buttons,
             runs_count=7,
             spacing=4,
             run_spacing=4,
             padding=ft.padding.all(10),
         )
-
-        self.today = datetime.now(self.tz_info)
-        start_of_month = datetime(self.current_year, self.current_month, 1)
-        start_day_of_week = start_of_month.weekday()
-        end_of_month = start_of_month.replace(
-            month=start_of_month.month % 12 + 1, day=1
-        ) - timedelta(days=1)
-        days_in_month = end_of_month.day
-
-        filler_days = (start_day_of_week + 7) % 7
-        for i in range(filler_days):
-            day = (start_of_month - timedelta(days=filler_days - i)).day
-            grid.controls.append(self.create_day_button(str(day), is_filler=True))
-
-        for i in range(1, days_in_month + 1):
-            day = datetime(self.current_year, self.current_month, i)
-            if not self.show_today:
-                is_today = False
-            else:
-                is_today = (
-                    self.current_month == self.today.month
-                    and self.current_year == self.today.year
-                    and i == self.today.day
-                )
-            button = self.create_day_button(str(i), is_today=is_today, day_date=day)
-            grid.controls.append(button)
-
-        next_month_day_count = (7 - (end_of_month.weekday() + 1)) % 7
-        for i in range(1, next_month_day_count + 1):
-            grid.controls.append(self.create_day_button(str(i), is_filler=True))
-
+        self.fill_calendar()
         return grid
 
-    def create_day_button(self, text, is_today=False, is_filler=False, day_date=None):
+    def fill_calendar(self):
+        self.today = datetime.now(self.tz_info)
+        cells = month_layout(self.current_year, self.current_month, self.first_weekday)
+        for idx, button in enumerate(self.day_buttons):
+            if idx >= len(cells):
+                button.visible = False
+                button.data = None
+                continue
+            text, day_date = cells[idx]
+            is_today = (
+                self.show_today
+                and day_date is not None
+                and (day_date.year, day_date.month, day_date.day)
+                == (self.today.year, self.today.month, self.today.day)
+            )
+            bgcolor, bordercolor, color = self.day_colors(
+                is_today=is_today,
+                is_filler=day_date is None,
+                is_selected=day_date in self.selected_dates,
+            )
+            button.visible = True
+            button.text = text
+            button.data = day_date
+            button.enabled = day_date is not None
+            button.style.bgcolor = bgcolor
+            button.style.side = ft.BorderSide(1, bordercolor)
+            button.style.color = color
+
+    def day_colors(self, is_today=False, is_filler=False, is_selected=False):
         bgcolor = (
             self.colors.today_button_background_color
             if is_today
@@ -239,6 +290,20 @@ class DatePicker(ft.UserControl):
             if is_filler
             else self.colors.default_day_background_color
         )
+        color = (
+            self.colors.today_text_color
+            if is_today
+            else self.colors.filler_day_text_color
+            if is_filler
+            else self.colors.default_day_text_color
+        )
+        if is_selected:
+            bgcolor = self.colors.selected_date_background_color
+            color = self.colors.today_text_color
+        return bgcolor, bordercolor, color
+
+    def create_day_button(self, text, is_today=False, is_filler=False, day_date=None):
+        bgcolor, bordercolor, color = self.day_colors(is_today, is_filler)
         button = ft.TextButton(
             text=text,
             width=50,
@@ -248,11 +313,7 @@ class DatePicker(ft.UserControl):
             style=ft.ButtonStyle(
                 bgcolor=bgcolor,
                 side=ft.BorderSide(1, bordercolor),
-                color=self.colors.today_text_color
-                if is_today
-                else self.colors.filler_day_text_color
-                if is_filler
-                else self.colors.default_day_text_color,
+                color=color,
                 shape=ft.ContinuousRectangleBorder(radius=12),
                 padding=2,
             ),
@@ -297,7 +358,6 @@ class DatePicker(ft.UserControl):
         self.calendarpicker.height = 0 if not toggle else 350
         self.calendarpicker.opacity = 0 if not toggle else 1
         self.calendarpicker.update()
-        time.sleep(0.4)
 
     def build_calendarpicker(self):
         def on_control_click(e):
@@ -404,11 +464,10 @@ class DatePicker(ft.UserControl):
 
     def toggle_dropdown(self, e):
         if self.show_splash:
-            if self.animated:
-                self.animate_dropdown(toggle=False)
             self.unfocus_dropdown()
-            self.close_calendar_dropdown()
+            self.hide_calendar_dropdown()
         else:
+            self.cancel_animation()
             self.dropdown_starter.content.content.controls[0].set_hover_state(None)
             self.dropdown_starter.content.content.controls[1].content = ft.Icon(
                 name=self.dropdown_icons[1],
@@ -420,12 +479,13 @@ class DatePicker(ft.UserControl):
                 self._dropdown_starter_bounds["bottom_left"]
             )
             self.show_splash = True
+            self.scroll_dispatcher.opened(self)
 
         self.dropdown_starter.update()
         self.page.update()
-        if self.animated:
-            time.sleep(0.01)
-            self.animate_dropdown(toggle=True)
+        if self.animated and self.show_splash:
+            # let the splash mount before animating it open
+            self.schedule_animation(0.01, self.animate_dropdown, True)
 
     def calculate_bounds(self, event, height=50):
         top_left = (event.global_x - event.local_x, event.global_y - event.local_y)
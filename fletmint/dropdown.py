@@ -1,7 +1,15 @@
+import asyncio
 import flet as ft
-import time
+import math
+import threading
+import traceback
+from collections import OrderedDict
+from .page_scroll import PageScrollDispatcher
+from .scheduler import shared_scheduler
+from .search_index import SearchIndex
 from .text_input import TextInput
 from dataclasses import dataclass
+from enum import Enum
 
 
 @dataclass
@@ -36,10 +44,15 @@ class DropDownColors:
         )
 
 
+class DropdownHoverMode(Enum):
+    SERVER = "server"
+    CLIENT = "client"
+
+
 class Dropdown(ft.UserControl):
     def __init__(
         self,
-        controls,
+        controls=None,
         animated=True,
         drodown_icons=[
             ft.icons.ARROW_DROP_DOWN_ROUNDED,
@@ -48,95 +61,257 @@ class Dropdown(ft.UserControl):
         theme=ft.ThemeMode.DARK,
         max_width=300,
         on_select=None,
+        virtualized=False,
+        max_height=300,
+        row_height=42,
+        overscan=10,
+        searchable=False,
+        max_results=50,
+        data_source=None,
+        page_size=50,
+        cached_pages=32,
+        hover_mode: DropdownHoverMode | str = DropdownHoverMode.SERVER,
         **kwargs,
     ):
         super().__init__(**kwargs)
         self.animated = animated
         self.show_splash = False
-        self.controls = controls
-        self.controls_num = len(controls)
+        self.controls = controls if controls is not None else []
+        self.controls_num = len(self.controls)
         self.max_width = max_width
+        self.max_height = max_height
+        # virtualized: `controls` are plain strings and only the rows in view
+        # (plus `overscan` on each side) exist as controls, reused on scroll
+        self.virtualized = virtualized or data_source is not None
+        self.row_height = row_height
+        self.overscan = overscan
+        self.option_rows = []
+        self._viewport_height = max_height
+        self._window_start = 0
+        self._window_end = 0
+        self._first_visible = 0
+        # searchable: typing in the starter shows the best `max_results`
+        # matches, looked up in an index built once over the labels
+        self.searchable = searchable
+        self.max_results = max_results
+        self.shown = None
+        self.search_index = (
+            SearchIndex([self.option_label(control) for control in self.controls])
+            if searchable and data_source is None
+            else None
+        )
+        # data_source(query, offset, limit) returns (or, if it's a coroutine
+        # function, resolves to) a list of labels; pages are fetched while
+        # scrolling or typing and the last `cached_pages` are kept
+        self.data_source = data_source
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.page_cache = OrderedDict()
+        self.query = ""
+        self.loaded = []
+        self.exhausted = False
+        self.request_key = None
+        self.request_generation = 0
+        self.pending_request = None
+        self.request_lock = threading.Lock()
         self.dropdown_icons = drodown_icons
         self.colors = (
             DropDownColors.dark()
             if theme == ft.ThemeMode.DARK
             else DropDownColors.light()
         )
+        # CLIENT: rows are buttons whose hover colors are ButtonStyle states,
+        # so moving the pointer over them sends nothing to the server
+        self.hover_mode = (
+            DropdownHoverMode(hover_mode) if isinstance(hover_mode, str) else hover_mode
+        )
+        self.row_style = ft.ButtonStyle(
+            color={
+                ft.ControlState.HOVERED: self.colors.selected_control_text_color,
+                ft.ControlState.DEFAULT: self.colors.unselected_control_text_color,
+            },
+            bgcolor={
+                ft.ControlState.HOVERED: self.colors.selected_control_background_color,
+                ft.ControlState.DEFAULT: ft.colors.TRANSPARENT,
+            },
+            overlay_color=ft.colors.TRANSPARENT,
+            shape=ft.RoundedRectangleBorder(radius=8),
+            padding=5,
+        )
         self._on_select = on_select
         self._dropdown_starter_bounds = None
+        self.pending_animation = None
 
     def did_mount(self):
-        self.page.on_scroll = self.on_page_scroll
+        self.scroll_dispatcher = PageScrollDispatcher.for_page(self.page)
         self.theme = self.page.theme_mode
         self.page.update()
+        if self.data_source is not None and not self.loaded:
+            self.request_page(0)
 
-    def on_page_scroll(self, e):
-        if self.show_splash:
-            if e.event_type == "update":
-                new_position_y = (
-                    self._dropdown_starter_bounds["bottom_left"][1] - e.pixels
-                )
+    def will_unmount(self):
+        self.cancel_animation()
+        self.scroll_dispatcher.closed(self)
 
-                # Check if the new position is within the viewport
-                if self.is_within_viewport(new_position_y):
-                    self.page.splash = self.update_dropdown_position(
-                        (
-                            self._dropdown_starter_bounds["bottom_left"][0],
-                            new_position_y,
-                        )
-                    )
-                else:
-                    # hide the splash if it is out of viewport
-                    self.page.splash = None
+    def reposition_splash(self, pixels):
+        # called by the page's scroll dispatcher while the dropdown is open
+        new_position_y = self._dropdown_starter_bounds["bottom_left"][1] - pixels
 
-                self.page.update()
+        # Check if the new position is within the viewport
+        if self.is_within_viewport(new_position_y):
+            self.page.splash = self.update_dropdown_position(
+                (
+                    self._dropdown_starter_bounds["bottom_left"][0],
+                    new_position_y,
+                )
+            )
+        elif self.page.splash is self.dropdown:
+            # hide the splash if it is out of viewport
+            self.page.splash = None
+
+    @staticmethod
+    def option_label(control):
+        if isinstance(control, str):
+            return control.title()
+        return str(getattr(control, "value", None) or "")
 
     def build_controls(self):
         if isinstance(self.controls[0], str):
             return [
-                ft.Text(
-                    data.title(),
-                    color=self.colors.unselected_control_text_color,
-                    size=15,
-                )
+                ft.Text(data.title(), color=self.text_color(), size=15)
                 for data in self.controls
             ]
         else:
             return self.controls
 
-    def build_dropdown(self):
-        def on_control_hover(e):
-            e.control.bgcolor = (
-                self.colors.selected_control_background_color
-                if e.data == "true"
-                else ""
-            )
-            e.control.content.content.color = (
-                self.colors.selected_control_text_color
-                if e.data == "true"
-                else self.colors.unselected_control_text_color
-            )
-            e.control.update()
+    def on_control_hover(self, e):
+        e.control.bgcolor = (
+            self.colors.selected_control_background_color
+            if e.data == "true"
+            else ""
+        )
+        e.control.content.content.color = (
+            self.colors.selected_control_text_color
+            if e.data == "true"
+            else self.colors.unselected_control_text_color
+        )
+        e.control.update()
 
-        controls = [
-            ft.Container(
-                ft.Container(
+    def text_color(self):
+        # client-side hover needs the label to take the button's state color
+        if self.hover_mode == DropdownHoverMode.CLIENT:
+            return None
+        return self.colors.unselected_control_text_color
+
+    def build_option_row(self, control):
+        if self.hover_mode == DropdownHoverMode.CLIENT:
+            return ft.TextButton(
+                content=ft.Container(
                     control,
                     width=self.max_width,
                     height=30,
-                    margin=5,
                     padding=ft.padding.only(top=3, left=15),
                 ),
-                border_radius=8,
-                on_hover=on_control_hover,
+                style=self.row_style,
+                height=self.row_height if self.virtualized else 40,
                 on_click=self.on_control_click,
             )
-            for control in self.build_controls()
-        ]
+        return ft.Container(
+            ft.Container(
+                control,
+                width=self.max_width,
+                height=30,
+                margin=5,
+                padding=ft.padding.only(top=3, left=15),
+            ),
+            border_radius=8,
+            height=self.row_height if self.virtualized else None,
+            on_hover=self.on_control_hover,
+            on_click=self.on_control_click,
+        )
+
+    def build_options_view(self):
+        self._top_spacer = ft.Container(height=0)
+        self._bottom_spacer = ft.Container(height=0)
+        self.options_view = ft.ListView(spacing=0, on_scroll=self.on_options_scroll)
+        self.fill_options(0)
+        return self.options_view
+
+    def shown_count(self):
+        if self.data_source is not None:
+            return len(self.loaded)
+        return self.controls_num if self.shown is None else len(self.shown)
+
+    def option_at(self, idx):
+        if self.data_source is not None:
+            return idx, self.loaded[idx]
+        option = idx if self.shown is None else self.shown[idx]
+        return option, self.option_label(self.controls[option])
+
+    def fill_options(self, first_visible):
+        total = self.shown_count()
+        visible = math.ceil(self._viewport_height / self.row_height)
+        end = min(total, first_visible + visible + self.overscan)
+        start = min(max(0, first_visible - self.overscan), end)
+
+        while len(self.option_rows) < end - start:
+            self.option_rows.append(
+                self.build_option_row(
+                    ft.Text(color=self.text_color(), size=15)
+                )
+            )
+        rows = self.option_rows[: end - start]
+        for idx, row in zip(range(start, end), rows):
+            # rows keep their controls, only the label (and a leftover hover
+            # highlight) changes when they move to another option
+            row.data, row.content.content.value = self.option_at(idx)
+            if self.hover_mode == DropdownHoverMode.SERVER:
+                row.bgcolor = ""
+                row.content.content.color = self.colors.unselected_control_text_color
+
+        self._first_visible = first_visible
+        self._window_start, self._window_end = start, end
+        self._top_spacer.height = start * self.row_height
+        self._bottom_spacer.height = (total - end) * self.row_height
+        if self.data_source is not None and not self.exhausted:
+            # room for the page that is still to be fetched
+            self._bottom_spacer.height += self.row_height
+        self.options_view.controls = [self._top_spacer, *rows, self._bottom_spacer]
+
+    def on_options_scroll(self, e):
+        if e.viewport_dimension:
+            self._viewport_height = e.viewport_dimension
+        first_visible = int(e.pixels // self.row_height)
+        last_visible = first_visible + math.ceil(self._viewport_height / self.row_height)
+        if (
+            self.data_source is not None
+            and not self.exhausted
+            and last_visible + self.overscan >= len(self.loaded)
+        ):
+            self.request_page(len(self.loaded))
+        if (first_visible >= self._window_start or self._window_start == 0) and (
+            last_visible <= self._window_end or self._window_end == self.shown_count()
+        ):
+            return
+        self.fill_options(first_visible)
+        self.options_view.update()
+
+    def build_dropdown(self):
+        if self.virtualized:
+            options = self.build_options_view()
+        else:
+            self.all_rows = [
+                self.build_option_row(control) for control in self.build_controls()
+            ]
+            options = self.options_list = (
+                ft.ListView(self.all_rows, spacing=2)
+                if self.animated
+                else ft.Column(self.all_rows, spacing=2)
+            )
 
         if self.animated:
             self.dropdown = ft.Container(
-                ft.ListView(controls, spacing=2),
+                options,
                 padding=10,
                 bgcolor=self.colors.container_background_color,
                 border=ft.border.all(2, self.colors.container_border_color),
@@ -160,7 +335,8 @@ class Dropdown(ft.UserControl):
             )
         else:
             self.dropdown = ft.Container(
-                ft.Column(controls, spacing=2),
+                options,
+                height=self.dropdown_height() if self.virtualized else None,
                 padding=10,
                 bgcolor=self.colors.container_background_color,
                 border=ft.border.all(2, self.colors.container_border_color),
@@ -175,15 +351,129 @@ class Dropdown(ft.UserControl):
                 ),
             )
 
+    def refresh_options(self):
+        if (self.virtualized and not self.animated) or (
+            self.animated and self.show_splash
+        ):
+            self.dropdown.height = self.dropdown_height()
+        if self.show_splash:
+            self.dropdown.update()
+
+    def set_query(self, query):
+        with self.request_lock:
+            self.query = query
+            self.loaded = []
+            self.exhausted = False
+            # a cached run of consecutive pages is shown right away
+            while (query, len(self.loaded)) in self.page_cache:
+                items = self.cached_page((query, len(self.loaded)))
+                self.loaded.extend(items)
+                if len(items) < self.page_size:
+                    self.exhausted = True
+                    break
+        if not self.exhausted:
+            self.request_page(len(self.loaded))
+
+    def cached_page(self, key):
+        self.page_cache.move_to_end(key)
+        return self.page_cache[key]
+
+    def request_page(self, offset):
+        key = (self.query, offset)
+        with self.request_lock:
+            if key == self.request_key:
+                return
+            # whatever is still in flight was asked for an older query or
+            # scroll position and will be ignored (async sources get cancelled)
+            if self.pending_request is not None:
+                self.pending_request.cancel()
+                self.pending_request = None
+            self.request_key = key
+            self.request_generation += 1
+            generation = self.request_generation
+        if asyncio.iscoroutinefunction(self.data_source):
+            self.pending_request = self.page.run_task(
+                self.fetch_page_async, key, generation
+            )
+        else:
+            self.page.run_thread(self.fetch_page, key, generation)
+
+    def fetch_page(self, key, generation):
+        query, offset = key
+        try:
+            items = list(self.data_source(query, offset, self.page_size))
+        except Exception:
+            self.fail_page(generation)
+            return
+        self.apply_page(key, generation, items)
+
+    async def fetch_page_async(self, key, generation):
+        query, offset = key
+        try:
+            items = list(await self.data_source(query, offset, self.page_size))
+        except Exception:
+            self.fail_page(generation)
+            return
+        self.apply_page(key, generation, items)
+
+    def fail_page(self, generation):
+        # the page isn't cached, clearing the request lets the next scroll or
+        # query change ask for it again
+        traceback.print_exc()
+        with self.request_lock:
+            if generation == self.request_generation:
+                self.request_key = None
+                self.pending_request = None
+
+    def apply_page(self, key, generation, items):
+        items = list(items)
+        with self.request_lock:
+            self.page_cache[key] = items
+            self.page_cache.move_to_end(key)
+            while len(self.page_cache) > self.cached_pages:
+                self.page_cache.popitem(last=False)
+            if generation != self.request_generation:
+                return
+            self.request_key = None
+            self.pending_request = None
+            if key != (self.query, len(self.loaded)):
+                return
+            self.loaded.extend(items)
+            self.exhausted = len(items) < self.page_size
+        self.fill_options(self._first_visible)
+        self.refresh_options()
+
+    def on_search_change(self, e):
+        query = (e.control.value or "").strip()
+        if self.data_source is not None:
+            self.set_query(query)
+            self.fill_options(0)
+            if self.options_view.page:
+                self.options_view.scroll_to(offset=0)
+            self.refresh_options()
+            return
+        self.shown = (
+            self.search_index.search(query, self.max_results) if query else None
+        )
+        if self.virtualized:
+            self.fill_options(0)
+            if self.options_view.page:
+                self.options_view.scroll_to(offset=0)
+        else:
+            self.options_list.controls = (
+                self.all_rows
+                if self.shown is None
+                else [self.all_rows[idx] for idx in self.shown]
+            )
+        self.refresh_options()
+
     def on_control_click(self, e):
         self.selected_control_value = e.control.content.content.value
         self.dropdown_starter.content.content.controls[0].content.content.controls[
             0
         ].value = self.selected_control_value
         self.unfocus_dropdown()
-        if self.animated:
-            self.animate_dropdown(toggle=False)
-        self.close_dropdown()
+        self.hide_dropdown()
         if self._on_select:
             return self._on_select(self.selected_control_value)
 
@@ -196,11 +486,34 @@ class Dropdown(ft.UserControl):
         )
         self.dropdown_starter.update()
 
+    def hide_dropdown(self):
+        if self.animated:
+            self.show_splash = False
+            self.animate_dropdown(toggle=False)
+            # the splash goes away once the closing animation is over
+            self.schedule_animation(0.4, self.close_dropdown)
+        else:
+            self.close_dropdown()
+
     def close_dropdown(self):
-        self.page.splash = None
+        self.pending_animation = None
+        self.scroll_dispatcher.closed(self)
+        if self.page.splash is self.dropdown:
+            self.page.splash = None
         self.show_splash = False
         self.page.update()
 
+    def schedule_animation(self, delay, callback, *args):
+        # animation steps are timed on the shared scheduler thread, event
+        # handlers return right away instead of sleeping through them
+        self.cancel_animation()
+        self.pending_animation = shared_scheduler().call_later(delay, callback, *args)
+
+    def cancel_animation(self):
+        if self.pending_animation is not None:
+            self.pending_animation.cancel()
+            self.pending_animation = None
+
     def calculate_bounds(self, event, height=50):
         top_left = (event.global_x - event.local_x, event.global_y - event.local_y)
         return {
@@ -221,26 +534,29 @@ class Dropdown(ft.UserControl):
         dropdown.left = bottom_left[0]
         return dropdown
 
-    def animate_dropdown(self, toggle=False):
+    def dropdown_height(self):
+        if self.virtualized:
+            return min(self.shown_count() * self.row_height, self.max_height)
         control_height = 30  # height of each control
         control_margin = 5  # margin around each control
         control_spacing = 2  # spacing between controls
 
-        total_controls_height = self.controls_num * (
+        total_controls_height = self.shown_count() * (
             control_height + control_margin + control_spacing
         )
-        self.dropdown.height = 0 if not toggle else total_controls_height
+        return min(total_controls_height, self.max_height)
+
+    def animate_dropdown(self, toggle=False):
+        self.dropdown.height = 0 if not toggle else self.dropdown_height()
         self.dropdown.opacity = 0 if not toggle else 1
         self.dropdown.update()
-        time.sleep(0.4)
 
     def toggle_dropdown(self, e):
         if self.show_splash:
-            if self.animated:
-                self.animate_dropdown(toggle=False)
             self.unfocus_dropdown()
-            self.close_dropdown()
+            self.hide_dropdown()
         else:
+            self.cancel_animation()
             # If not showing, calculate bounds and show dropdown
             # set_hover_state on textfield + toggle dropdown icon on container
             self.dropdown_starter.content.content.controls[0].set_hover_state(None)
@@ -259,10 +575,11 @@ class Dropdown(ft.UserControl):
                 self._dropdown_starter_bounds["bottom_left"]
             )
             self.show_splash = True
+            self.scroll_dispatcher.opened(self)
             self.page.update()
             if self.animated:
-                time.sleep(0.01)
-                self.animate_dropdown(toggle=True)
+                # let the splash mount before animating it open
+                self.schedule_animation(0.01, self.animate_dropdown, True)
 
         self.dropdown_starter.update()
         self.page.update()
@@ -277,6 +594,11 @@ class Dropdown(ft.UserControl):
                     [
                         TextInput(
                             dense=True,
+                            on_change=(
+                                self.on_search_change
+                                if self.searchable or self.data_source is not None
+                                else None
+                            ),
                         ),
                         ft.Container(
                             ft.Icon(
@@ -0,0 +1,65 @@
+import threading
+import weakref
+from .scheduler import shared_scheduler
+
+
+class PageScrollDispatcher:
+    # one per page, it owns `page.on_scroll` and hands the scroll offset to
+    # the pickers whose splash is open, at most once per frame and with a
+    # single page.update(); with nothing open a scroll event costs nothing.
+    # It is stored on the page itself and only holds a weak reference back,
+    # so it goes away together with the page
+    _dispatchers_lock = threading.Lock()
+
+    def __init__(self, page, frame_interval=1 / 60):
+        self.page_ref = weakref.ref(page)
+        self.frame_interval = frame_interval
+        self.lock = threading.Lock()
+        self.open = []
+        self.pixels = None
+        self.pending_flush = None
+        # a handler assigned before the dispatcher keeps receiving every event
+        self.previous_handler = page.on_scroll
+        page.on_scroll = self.on_scroll
+
+    @classmethod
+    def for_page(cls, page):
+        with cls._dispatchers_lock:
+            dispatcher = getattr(page, "_fletmint_scroll_dispatcher", None)
+            if dispatcher is None:
+                dispatcher = page._fletmint_scroll_dispatcher = cls(page)
+            return dispatcher
+
+    def opened(self, overlay):
+        with self.lock:
+            if overlay not in self.open:
+                self.open.append(overlay)
+
+    def closed(self, overlay):
+        with self.lock:
+            if overlay in self.open:
+                self.open.remove(overlay)
+
+    def on_scroll(self, e):
+        if self.previous_handler is not None:
+            self.previous_handler(e)
+        if not self.open or e.event_type != "update":
+            return
+        with self.lock:
+            self.pixels = e.pixels
+            if self.pending_flush is None:
+                self.pending_flush = shared_scheduler().call_later(
+                    self.frame_interval, self.flush
+                )
+
+    def flush(self):
+        with self.lock:
+            self.pending_flush = None
+            overlays = list(self.open)
+            pixels = self.pixels
+        page = self.page_ref()
+        if not overlays or page is None:
+            return
+        for overlay in overlays:
+            overlay.reposition_splash(pixels)
+        page.update()
@@ -0,0 +1,90 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+
+class ScheduledCall:
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    # runs delayed callbacks on a single daemon thread, pending calls wait in a
+    # heap ordered by due time, so the thread count stays constant however
+    # many calls are pending. The thread exits once nothing is pending and is
+    # started again by the next call_later
+    def __init__(self, name="fletmint-scheduler"):
+        self.name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def call_later(self, delay, callback, *args):
+        call = ScheduledCall(time.monotonic() + max(delay, 0), callback, args)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            heapq.heappush(self._heap, (call.when, next(self._counter), call))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return call
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._heap.clear()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._thread = None
+                        return
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                if self._closed:
+                    self._thread = None
+                    return
+                _, _, call = heapq.heappop(self._heap)
+
+            if not call.cancelled:
+                try:
+                    call.callback(*call.args)
+                except Exception:
+                    traceback.print_exc()
+            # don't keep the last callback and its arguments alive while waiting
+            call = None
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def shared_scheduler():
+    # one scheduler thread for the short timers of every component (e.g. the
+    # end of an open/close animation)
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = Scheduler(name="fletmint-shared-scheduler")
+        return _shared_scheduler
@@ -0,0 +1,63 @@
+import bisect
+import re
+
+WORD_START = re.compile(r"(?<![^\W_])\w")
+
+
+class SearchIndex:
+    # built once over the labels, answers each query by bisecting two sorted
+    # lists (label prefixes, then word prefixes) and only falls back to the
+    # trigram postings for matches in the middle of a word (a scan of the
+    # labels for queries shorter than a trigram, until `limit` is reached)
+    def __init__(self, labels):
+        self.labels = [label.casefold() for label in labels]
+        self.prefixes = sorted((label, idx) for idx, label in enumerate(self.labels))
+        self.words = sorted(
+            (label[match.start() :], idx)
+            for idx, label in enumerate(self.labels)
+            for match in WORD_START.finditer(label)
+            if match.start()
+        )
+        self.trigrams = {}
+        for idx, label in enumerate(self.labels):
+            for gram in {label[i : i + 3] for i in range(len(label) - 2)}:
+                self.trigrams.setdefault(gram, []).append(idx)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def search(self, query, limit=50):
+        # ranked: labels starting with the query, then labels with a word
+        # starting with it, then labels containing it anywhere
+        query = query.casefold().strip()
+        if not query:
+            return list(range(min(limit, len(self.labels))))
+        found = []
+        seen = set()
+        for entries in (self.prefixes, self.words):
+            for position in range(bisect.bisect_left(entries, (query,)), len(entries)):
+                text, idx = entries[position]
+                if len(found) == limit or not text.startswith(query):
+                    break
+                if idx not in seen:
+                    seen.add(idx)
+                    found.append(idx)
+        if len(found) < limit:
+            postings = (
+                min(
+                    (
+                        self.trigrams.get(query[i : i + 3], ())
+                        for i in range(len(query) - 2)
+                    ),
+                    key=len,
+                )
+                if len(query) >= 3
+                else range(len(self.labels))
+            )
+            for idx in postings:
+                if len(found) == limit:
+                    break
+                if idx not in seen and query in self.labels[idx]:
+                    seen.add(idx)
+                    found.append(idx)
+        return found
@@ -1,6 +1,13 @@
+import asyncio
 import flet as ft
-from time import sleep
+import threading
+import time
+import traceback
+import weakref
+from collections import deque, namedtuple
 from enum import Enum
+from .metrics import Metrics
+from .scheduler import Scheduler
 
 
 class ToastPosition(Enum):
@@ -19,6 +26,12 @@ class ToastType(Enum):
     PROMISE = "promise"
 
 
+class ToastOverflow(Enum):
+    QUEUE = "queue"
+    DROP_OLDEST = "drop-oldest"
+    COLLAPSE = "collapse"
+
+
 class ToastColors(Enum):
     INFO = {
         "light": {
@@ -94,6 +107,14 @@ class ToastColors(Enum):
     }
 
 
+ToastIcons = {
+    ToastType.INFO: ft.icons.INFO_ROUNDED,
+    ToastType.SUCCESS: ft.icons.CHECK_CIRCLE_ROUNDED,
+    ToastType.WARNING: ft.icons.WARNING_ROUNDED,
+    ToastType.ERROR: ft.icons.ERROR_ROUNDED,
+}
+
+
 class Toast(ft.Container):
     def __init__(
         self,
@@ -146,73 +167,120 @@ class Toast(ft.Container):
         return ToastColors[toast_type.name].value["dark"]
 
     def default_content(self, toast_type, message, description, colors):
-        content = [ft.Text(message, color=colors["text_color"])]
-        if description:
-            content.append(ft.Text(description, color=colors["text_color"], size=9))
-
-        if toast_type == ToastType.INFO:
-            return ft.Row(
-                [
-                    ft.Icon(
-                        name=ft.icons.INFO_ROUNDED,
-                        size=18,
-                        color=colors["text_color"],
-                    ),
-                    ft.Column(
-                        content, alignment=ft.MainAxisAlignment.CENTER, spacing=0
-                    ),
-                ]
-            )
-        elif toast_type == ToastType.SUCCESS:
-            return ft.Row(
-                [
-                    ft.Icon(
-                        name=ft.icons.CHECK_CIRCLE_ROUNDED,
-                        size=18,
-                        color=colors["text_color"],
-                    ),
-                    ft.Column(
-                        content, alignment=ft.MainAxisAlignment.CENTER, spacing=0
-                    ),
-                ]
-            )
-        elif toast_type == ToastType.WARNING:
-            return ft.Row(
-                [
-                    ft.Icon(
-                        name=ft.icons.WARNING_ROUNDED,
-                        size=18,
-                        color=colors["text_color"],
-                    ),
-                    ft.Column(
-                        content, alignment=ft.MainAxisAlignment.CENTER, spacing=0
-                    ),
-                ]
-            )
-        elif toast_type == ToastType.ERROR:
-            return ft.Row(
-                [
-                    ft.Icon(
-                        name=ft.icons.ERROR_ROUNDED,
-                        size=18,
-                        color=colors["text_color"],
-                    ),
-                    ft.Column(
-                        content, alignment=ft.MainAxisAlignment.CENTER, spacing=0
-                    ),
-                ]
-            )
-        elif toast_type == ToastType.PROMISE:
-            return ft.Row(
-                [
-                    ft.ProgressRing(width=16, height=16, stroke_width=1),
-                    ft.Column(
-                        content, alignment=ft.MainAxisAlignment.CENTER, spacing=0
-                    ),
-                ]
+        # the same controls serve every toast type, so that set_message can
+        # change a toast in place instead of building a new tree
+        self.title = ft.Text()
+        self.description = ft.Text(size=9)
+        self.icon = ft.Icon(size=18)
+        self.spinner = ft.ProgressRing(width=16, height=16, stroke_width=1)
+        self.row = ft.Row(
+            [
+                self.icon,
+                self.spinner,
+                ft.Column(
+                    [self.title, self.description],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                    spacing=0,
+                ),
+            ]
+        )
+        self.fill_content(toast_type, message, description, colors)
+        return self.row
+
+    def fill_content(self, toast_type, message, description, colors):
+        icon = ToastIcons.get(toast_type)
+        self.title.value = message
+        self.title.color = colors["text_color"]
+        self.description.value = description
+        self.description.color = colors["text_color"]
+        self.description.visible = bool(description)
+        self.icon.name = icon
+        self.icon.color = colors["text_color"]
+        self.icon.visible = icon is not None
+        self.spinner.visible = toast_type == ToastType.PROMISE
+        self.row.alignment = (
+            ft.MainAxisAlignment.START
+            if icon is not None or toast_type == ToastType.PROMISE
+            else ft.MainAxisAlignment.CENTER
+        )
+
+    def set_message(self, toast_type, message, description=None):
+        if isinstance(toast_type, str):
+            toast_type = ToastType(toast_type)
+        colors = self.get_colors(toast_type)
+        if getattr(self, "title", None) is None:
+            self.content = self.default_content(
+                toast_type, message, description, colors
             )
         else:
-            return ft.Column(content, alignment=ft.MainAxisAlignment.CENTER, spacing=0)
+            self.fill_content(toast_type, message, description, colors)
+        self.bgcolor = colors["bgcolor"]
+        self.border = ft.border.all(1, colors["border_color"])
+
+
+ToastLayout = namedtuple("ToastLayout", "top bottom left right scale hover")
+
+
+class ToastHub:
+    # process-wide fan-out of toasts to the Toasters of every session, each
+    # toaster takes at most `rate_limit` broadcasts per `rate_period` seconds
+    # and shows them through its own batched update
+    def __init__(self, rate_limit=5, rate_period=1.0):
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.lock = threading.Lock()
+        self.topics = {}
+        self.allowance = weakref.WeakKeyDictionary()
+
+    def subscribe(self, toaster, *topics):
+        with self.lock:
+            for topic in topics:
+                self.topics.setdefault(topic, weakref.WeakSet()).add(toaster)
+
+    def unsubscribe(self, toaster, *topics):
+        with self.lock:
+            for topic in topics or list(self.topics):
+                subscribers = self.topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(toaster)
+                    if not subscribers:
+                        del self.topics[topic]
+            if not topics:
+                self.allowance.pop(toaster, None)
+
+    def subscribers(self, topic):
+        with self.lock:
+            return list(self.topics.get(topic, ()))
+
+    def broadcast(self, topic, **toast):
+        delivered = 0
+        for toaster in self.subscribers(topic):
+            if not self.allow(toaster):
+                toaster.count_dropped("rate_limited")
+                continue
+            try:
+                toaster.show_toast(**toast)
+            except Exception:
+                traceback.print_exc()
+                continue
+            delivered += 1
+        return delivered
+
+    def allow(self, toaster):
+        # token bucket refilled continuously at rate_limit per rate_period
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.allowance.get(toaster, (self.rate_limit, now))
+            tokens = min(
+                self.rate_limit,
+                tokens + (now - last) * self.rate_limit / self.rate_period,
+            )
+            allowed = tokens >= 1
+            self.allowance[toaster] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+
+toast_hub = ToastHub()
 
 
 class Toaster:
@@ -224,6 +292,15 @@ class Toaster:
         theme: str = "dark",
         default_toast_duration=3,
         default_offset=20,
+        update_interval=0.016,
+        max_visible=5,
+        max_queued=100,
+        overflow: ToastOverflow | str = ToastOverflow.QUEUE,
+        deduplicate=False,
+        pool_size=10,
+        topics=(),
+        hub: ToastHub | None = None,
+        metrics=False,
     ):
         self.theme = theme
         self.page = page
@@ -241,6 +318,33 @@ class Toaster:
         self.page.overlay.append(self.stack)
         self.is_hovered = False
         self.is_expanded = expand
+        # one scheduler thread handles the expiry of every toast of this toaster,
+        # it only runs while expirations are pending
+        self.scheduler = Scheduler(name="fletmint-toaster")
+        self.expirations = {}
+        self.lock = threading.RLock()
+        self.update_interval = update_interval
+        self.pending_flush = None
+        # at most `max_visible` toasts are mounted, the rest wait in `queue`
+        self.max_visible = max_visible
+        self.max_queued = max_queued
+        self.overflow = (
+            ToastOverflow(overflow) if isinstance(overflow, str) else overflow
+        )
+        self.deduplicate = deduplicate
+        self.queue = deque()
+        self.duplicates = {}
+        self.dropped = 0
+        self.rate_limited = 0
+        self.summary_toast = None
+        # removed toasts stay mounted but hidden and get refilled by later ones
+        self.pool_size = pool_size
+        self.pool = []
+        self.hub = hub or toast_hub
+        if topics:
+            self.hub.subscribe(self, *topics)
+        self.metrics = Metrics() if metrics else None
+        self.pending_renders = {}
 
     def show_toast(
         self,
@@ -251,124 +355,445 @@ class Toaster:
         duration=3,
         toast_type="default",
     ):
-        toast = (
-            toast
-            if toast
-            else Toast(
-                content=message,
-                text=text,
-                description=description,
-                toast_type=toast_type,
-            )
-        )
-        self.set_toast_position(toast, 0)
-        self.stack.controls.append(toast)  # Insert the new toast at the top
+        if isinstance(toast_type, str):
+            toast_type = ToastType(toast_type)
+        key = None
+        if (
+            self.deduplicate
+            and toast is None
+            and message is None
+            and toast_type != ToastType.PROMISE
+        ):
+            key = (toast_type, text, description)
+        with self.lock:
+            if key in self.duplicates:
+                if self.metrics is not None:
+                    self.metrics.increment("deduplicated")
+                return self.repeat_toast(self.duplicates[key], duration)
+            if toast is None and message is None:
+                toast = self.acquire_toast(text, description, toast_type)
+                # `key` is a flet property sent to the client, hence dedupe_key
+                toast.dedupe_key, toast.count = key, 1
+                if key is not None:
+                    self.duplicates[key] = toast
+            elif toast is None:
+                toast = Toast(content=message, toast_type=toast_type)
+            self.track_render(toast)
+
+            if self.max_visible and len(self.toasts) >= self.max_visible:
+                if self.overflow == ToastOverflow.DROP_OLDEST:
+                    self.count_dropped("overflow")
+                    self.discard_toast(self.toasts[-1])
+                else:
+                    self.enqueue_toast(toast, duration)
+                    return toast
+            self.display_toast(toast, duration)
+        return toast
+
+    def track_render(self, toast):
+        if self.metrics is not None:
+            self.pending_renders[toast] = time.perf_counter()
+
+    def acquire_toast(self, text, description, toast_type):
+        if not self.pool:
+            toast = Toast(text=text, description=description, toast_type=toast_type)
+            toast.recyclable = True
+            toast.generation = 0
+            return toast
+        toast = self.pool.pop()
+        toast.set_message(toast_type, text, description)
+        return toast
+
+    def release_toast(self, toast):
+        self.pending_renders.pop(toast, None)
+        # anyone still holding the toast (a pending promise, an expiry timer)
+        # belongs to the previous generation and must leave it alone
+        toast.generation = getattr(toast, "generation", 0) + 1
+        if getattr(toast, "recyclable", False) and len(self.pool) < self.pool_size:
+            toast.visible = False
+            if getattr(toast, "applied_layout", None) is not None:
+                self.apply_layout(toast, toast.applied_layout._replace(hover=False))
+            if toast not in self.stack.controls:
+                self.stack.controls.insert(0, toast)
+            self.pool.append(toast)
+        elif toast in self.stack.controls:
+            self.stack.controls.remove(toast)
+
+    def display_toast(self, toast, duration):
+        toast.visible = True
+        # a recycled toast is refilled in place, unless stacked toasts overlap
+        # and it has to be moved on top of the others
+        if toast in self.stack.controls:
+            if not self.is_expanded and self.stack.controls[-1] is not toast:
+                self.stack.controls.remove(toast)
+                self.stack.controls.append(toast)
+        else:
+            self.stack.controls.append(toast)  # Insert the new toast at the top
         self.toasts.insert(0, toast)  # Maintain the order of toasts
         self.reposition_toasts()
-        self.page.update()
 
         if duration > 0:
+            self.schedule_removal(toast, duration)
+        if self.metrics is not None:
+            self.metrics.increment("shown")
+
+    def enqueue_toast(self, toast, duration):
+        if self.max_queued is not None and len(self.queue) >= self.max_queued:
+            self.count_dropped("overflow")
+            dropped = self.queue.popleft()[0]
+            self.forget_duplicate(dropped)
+            self.release_toast(dropped)
+        self.queue.append([toast, duration])
+        if self.overflow == ToastOverflow.COLLAPSE:
+            self.update_summary()
+
+    def promote_queued(self):
+        while self.queue and (
+            not self.max_visible or len(self.toasts) < self.max_visible
+        ):
+            self.display_toast(*self.queue.popleft())
+        if self.overflow == ToastOverflow.COLLAPSE:
+            self.update_summary()
+
+    def count_dropped(self, reason):
+        # "overflow": pushed out by max_visible / max_queued,
+        # "rate_limited": refused by the hub
+        with self.lock:
+            if reason == "rate_limited":
+                self.rate_limited += 1
+            else:
+                self.dropped += 1
+
+    def queued_entry(self, toast):
+        for entry in self.queue:
+            if entry[0] is toast:
+                return entry
+        return None
+
+    def repeat_toast(self, toast, duration):
+        toast.count += 1
+        text = toast.dedupe_key[1]
+        toast.title.value = f"{text} (×{toast.count})"
+        entry = self.queued_entry(toast)
+        if entry is not None:
+            entry[1] = duration
+        else:
+            if duration > 0:
+                self.schedule_removal(toast, duration)
+            self.request_update()
+        return toast
 
-            def __remove_toast():
-                sleep(duration)
-                if toast in self.stack.controls:
-                    self.remove_toast(toast)
+    def forget_duplicate(self, toast):
+        key = getattr(toast, "dedupe_key", None)
+        if key is not None and self.duplicates.get(key) is toast:
+            del self.duplicates[key]
 
-            self.page.run_thread(__remove_toast)
+    def update_summary(self):
+        # collapse mode: the queued toasts are represented by one "+N more"
+        # toast stacked below the visible ones
+        hidden = len(self.queue)
+        if not hidden:
+            if self.summary_toast is not None:
+                self.stack.controls.remove(self.summary_toast)
+                self.summary_toast = None
+                self.request_update()
+            return
+        if self.summary_toast is None:
+            self.summary_toast = Toast(text=f"+{hidden} more")
+            self.stack.controls.insert(0, self.summary_toast)
+        else:
+            self.summary_toast.title.value = f"+{hidden} more"
+        self.reposition_toasts()
 
-    def remove_toast(self, toast):
-        self.stack.controls.remove(toast)
+    def schedule_removal(self, toast, delay):
+        with self.lock:
+            self.cancel_removal(toast)
+            self.expirations[toast] = self.call_later(
+                delay, self.expire_toast, toast, self.generation_of(toast)
+            )
+
+    def cancel_removal(self, toast):
+        with self.lock:
+            expiration = self.expirations.pop(toast, None)
+            if expiration is not None:
+                expiration.cancel()
+
+    @staticmethod
+    def generation_of(toast):
+        return getattr(toast, "generation", 0)
+
+    def is_stale(self, toast, generation):
+        return generation is not None and generation != self.generation_of(toast)
+
+    def expire_toast(self, toast, generation=None):
+        with self.lock:
+            if self.is_stale(toast, generation):
+                return
+            self.expirations.pop(toast, None)
+            if toast in self.toasts:
+                self.remove_toast(toast)
+
+    def remove_toast(self, toast, generation=None):
+        with self.lock:
+            if self.is_stale(toast, generation):
+                return
+            entry = self.queued_entry(toast)
+            if entry is not None:
+                self.queue.remove(entry)
+                self.forget_duplicate(toast)
+                self.release_toast(toast)
+                if self.metrics is not None:
+                    self.metrics.increment("removed")
+                if self.overflow == ToastOverflow.COLLAPSE:
+                    self.update_summary()
+                return
+            if toast in self.toasts:
+                self.discard_toast(toast)
+                self.promote_queued()
+
+    def discard_toast(self, toast):
+        self.cancel_removal(toast)
+        self.forget_duplicate(toast)
         self.toasts.remove(toast)
+        self.release_toast(toast)
+        if self.metrics is not None:
+            self.metrics.increment("removed")
         self.reposition_toasts()
-        self.page.update()
 
-    def reposition_toasts(self):
-        for i, toast in enumerate(self.toasts):
-            if self.is_hovered or self.is_expanded:
-                self.set_toast_position(toast, i, as_column=True)
+    def call_later(self, delay, callback, *args):
+        # called from the event loop of an async app the timer is a loop
+        # callback, otherwise it goes to the toaster's scheduler thread
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.scheduler.call_later(delay, callback, *args)
+        return loop.call_later(delay, callback, *args)
+
+    def subscribe(self, *topics):
+        self.hub.subscribe(self, *topics)
+
+    def unsubscribe(self, *topics):
+        self.hub.unsubscribe(self, *topics)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+        self.scheduler.close()
+        with self.lock:
+            for expiration in self.expirations.values():
+                expiration.cancel()
+            self.expirations.clear()
+            if self.pending_flush is not None:
+                self.pending_flush.cancel()
+            self.pending_flush = None
+            self.queue.clear()
+            self.duplicates.clear()
+            self.pool.clear()
+
+    def request_update(self):
+        # changes made within `update_interval` are sent together by a single
+        # update of the overlay stack instead of one page.update() each
+        with self.lock:
+            if self.update_interval <= 0:
+                self.flush_updates()
+            elif self.pending_flush is None:
+                self.pending_flush = self.call_later(
+                    self.update_interval, self.flush_updates
+                )
+
+    def flush_updates(self):
+        with self.lock:
+            self.pending_flush = None
+            start = time.perf_counter()
+            if self.stack.page is None:
+                # the overlay stack gets mounted by the first page update
+                self.page.update()
             else:
-                self.set_toast_position(toast, i)
-        self.page.update()
+                self.stack.update()
+            if self.metrics is not None:
+                end = time.perf_counter()
+                self.metrics.observe("update_seconds", end - start)
+                for toast in self.toasts:
+                    shown_at = self.pending_renders.pop(toast, None)
+                    if shown_at is not None:
+                        self.metrics.observe("show_to_render_seconds", end - shown_at)
 
-    def set_toast_position(self, toast, index, as_column=False):
-        base_offset = self.default_offset
-        spacing = 10
+    def snapshot(self):
+        with self.lock:
+            metrics = (
+                self.metrics.snapshot()
+                if self.metrics is not None
+                else {"counters": {}, "histograms": {}}
+            )
+            metrics["counters"]["dropped"] = self.dropped
+            metrics["counters"]["rate_limited"] = self.rate_limited
+            metrics["gauges"] = {
+                "visible": len(self.toasts),
+                "queued": len(self.queue),
+                "pooled": len(self.pool),
+                "pending_expirations": len(self.expirations),
+            }
+        return metrics
+
+    def reposition_toasts(self):
+        with self.lock:
+            self.apply_layouts()
+            self.request_update()
+
+    def apply_layouts(self):
+        # computes where every mounted toast belongs and only writes the
+        # properties that differ from the layout applied last time, so the
+        # next update doesn't carry unchanged positions and handlers
+        start = time.perf_counter()
+        # only the mounted toasts are walked, queued ones have no position
+        toasts = self.toasts
+        if self.summary_toast is not None:
+            toasts = toasts + [self.summary_toast]
+        as_column = self.is_hovered or self.is_expanded
+        changed = False
+        for i, toast in enumerate(toasts):
+            changed |= self.apply_layout(toast, self.toast_layout(i, as_column))
+        if self.metrics is not None:
+            self.metrics.observe("reposition_seconds", time.perf_counter() - start)
+        return changed
 
+    def toast_layout(self, index, as_column=False):
         if as_column:
-            if "top" in self.position:
-                toast.top = base_offset + (index * 60)
-                toast.bottom = None
-            elif "bottom" in self.position:
-                toast.bottom = base_offset + (index * 60)
-                toast.top = None
-            toast.scale = 1
-        else:
-            if "top" in self.position:
-                toast.top = 20 + (index * 10)  # Adjust this to overlap toasts closely
-                toast.bottom = None
-            else:
-                toast.bottom = 20 + (
-                    index * 10
-                )  # Adjust this to overlap toasts closely
-                toast.top = None
-            toast.scale = 1 - (0.05 * index)  # Scale previous toasts down
-
-        if "left" in self.position:
-            toast.left = 20
-            toast.right = None
-        elif "right" in self.position:
-            toast.right = 20
-            toast.left = None
+            offset = self.default_offset + (index * 60)
+            scale = 1
         else:
-            toast.left = None
-            toast.right = None
-
+            offset = 20 + (index * 10)  # Adjust this to overlap toasts closely
+            scale = 1 - (0.05 * index)  # Scale previous toasts down
+        top = offset if "top" in self.position else None
+        bottom = None if "top" in self.position else offset
+        left = 20 if "left" in self.position else None
+        right = 20 if "right" in self.position and left is None else None
         # Only the top toast handles hover events
-        if index == 0 and not self.is_expanded:
-            toast.on_hover = self.on_hover
-        else:
-            toast.on_hover = None
+        hover = index == 0 and not self.is_expanded
+        return ToastLayout(top, bottom, left, right, scale, hover)
+
+    def apply_layout(self, toast, layout):
+        applied = getattr(toast, "applied_layout", None)
+        if applied == layout:
+            return False
+        if applied is None or applied.top != layout.top:
+            toast.top = layout.top
+        if applied is None or applied.bottom != layout.bottom:
+            toast.bottom = layout.bottom
+        if applied is None or applied.left != layout.left:
+            toast.left = layout.left
+        if applied is None or applied.right != layout.right:
+            toast.right = layout.right
+        if applied is None or applied.scale != layout.scale:
+            toast.scale = layout.scale
+        if applied is None or applied.hover != layout.hover:
+            toast.on_hover = self.on_hover if layout.hover else None
+        toast.applied_layout = layout
+        return True
+
+    def set_toast_position(self, toast, index, as_column=False):
+        self.apply_layout(toast, self.toast_layout(index, as_column))
 
     def on_hover(self, e):
-        self.is_hovered = e.data == "true"
-        self.reposition_toasts()
+        with self.lock:
+            self.is_hovered = e.data == "true"
+            if self.apply_layouts():
+                self.request_update()
 
     def show_promise_toast(
         self, function, success_message, error_message, descriptive=False
     ):
-        promise_toast = Toast(
-            text="Loading...",
-            toast_type=ToastType.PROMISE,
+        promise_toast = self.show_toast(
+            text="Loading...", toast_type=ToastType.PROMISE, duration=0
         )
-        self.show_toast(toast=promise_toast, duration=0)
+        generation = self.generation_of(promise_toast)
 
         def run_function():
             try:
                 result = function()
-                description = result if descriptive else None
-                self.page.run_thread(
-                    lambda: self.update_toast(
-                        promise_toast, success_message, description, ToastType.SUCCESS
-                    )
-                )
             except Exception as e:
                 description = e if descriptive else None
-                self.page.run_thread(
-                    lambda: self.update_toast(
-                        promise_toast, error_message, description, ToastType.ERROR
-                    )
+                self.update_toast(
+                    promise_toast,
+                    error_message,
+                    description,
+                    ToastType.ERROR,
+                    generation=generation,
                 )
+                return
+            description = result if descriptive else None
+            self.update_toast(
+                promise_toast,
+                success_message,
+                description,
+                ToastType.SUCCESS,
+                generation=generation,
+            )
 
         self.page.run_thread(run_function)
 
-    def update_toast(self, toast, message, description, toast_type):
-        toast_type = (
-            ToastType(toast_type) if isinstance(toast_type, str) else toast_type
+    async def show_toast_async(
+        self,
+        message=None,
+        text=None,
+        description=None,
+        toast=None,
+        duration=3,
+        toast_type="default",
+    ):
+        # same as show_toast, running on the loop makes the expiry a loop timer
+        return self.show_toast(
+            message=message,
+            text=text,
+            description=description,
+            toast=toast,
+            duration=duration,
+            toast_type=toast_type,
+        )
+
+    async def show_promise_toast_async(
+        self, awaitable, success_message, error_message, descriptive=False
+    ):
+        promise_toast = self.show_toast(
+            text="Loading...", toast_type=ToastType.PROMISE, duration=0
         )
-        colors = ToastColors[toast_type.name].value["dark"]
-        toast.content = toast.default_content(toast_type, message, description, colors)
-        toast.bgcolor = colors["bgcolor"]
-        toast.border = ft.border.all(1, colors["border_color"])
-        self.page.update()
-        sleep(3)
-        self.remove_toast(toast)
+        generation = self.generation_of(promise_toast)
+
+        try:
+            result = await awaitable
+        except asyncio.CancelledError:
+            self.remove_toast(promise_toast, generation)
+            raise
+        except Exception as e:
+            description = e if descriptive else None
+            self.update_toast(
+                promise_toast,
+                error_message,
+                description,
+                ToastType.ERROR,
+                generation=generation,
+            )
+            return None
+        description = result if descriptive else None
+        self.update_toast(
+            promise_toast,
+            success_message,
+            description,
+            ToastType.SUCCESS,
+            generation=generation,
+        )
+        return result
+
+    def update_toast(
+        self, toast, message, description, toast_type, duration=3, generation=None
+    ):
+        with self.lock:
+            if self.is_stale(toast, generation):
+                return
+            self.forget_duplicate(toast)
+            toast.set_message(toast_type, message, description)
+            self.request_update()
+            entry = self.queued_entry(toast)
+            if entry is not None:
+                entry[1] = duration
+            else:
+                self.schedule_removal(toast, duration)